@@ -0,0 +1,251 @@
+# Batch analytics for admins: per-word, per-quiz-question and per-topic difficulty and mastery,
+# precomputed into word_stats / quiz_stats / topic_stats so /api/admin/analytics never reads
+# raw history.
+#
+# quiz_attempts is append-only, so it is folded in incrementally: each run aggregates only the
+# rows above the stored watermark, one id range per transaction, and adds the deltas onto the
+# running totals (the watermark moves in the same transaction, so a crashed run resumes cleanly).
+# progress rows are updated in place, so their columns are recomputed on every run, a range of
+# users at a time; that pass is bounded by users x words, not by history.
+import time
+
+WATERMARK_SOURCE = 'quiz_attempts'
+
+FOLD_WORDS = '''
+    INSERT INTO word_stats (vocab_id, attempts, correct)
+    SELECT vocab_id, COUNT(*), SUM(is_correct) FROM quiz_attempts
+    WHERE id > ? AND id <= ? AND vocab_id IS NOT NULL
+    GROUP BY vocab_id
+    ON CONFLICT (vocab_id) DO UPDATE SET
+        attempts = attempts + excluded.attempts,
+        correct = correct + excluded.correct
+'''
+FOLD_QUIZZES = '''
+    INSERT INTO quiz_stats (quiz_id, attempts, correct)
+    SELECT quiz_id, COUNT(*), SUM(is_correct) FROM quiz_attempts
+    WHERE id > ? AND id <= ? AND quiz_id IS NOT NULL
+    GROUP BY quiz_id
+    ON CONFLICT (quiz_id) DO UPDATE SET
+        attempts = attempts + excluded.attempts,
+        correct = correct + excluded.correct
+'''
+
+# Scratch tables for the progress pass, private to the batch connection
+PROGRESS_TEMP_TABLES = (
+    '''
+    CREATE TEMP TABLE IF NOT EXISTS analytics_words (
+        vocab_id INTEGER PRIMARY KEY,
+        learners INTEGER NOT NULL,
+        learned INTEGER NOT NULL,
+        practice_count INTEGER NOT NULL,
+        practice_correct INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TEMP TABLE IF NOT EXISTS analytics_topics (
+        topic_id INTEGER PRIMARY KEY,
+        learners INTEGER NOT NULL
+    )
+    ''',
+)
+# A chunk holds every progress row of its users, so distinct learners per topic add up across chunks
+ACCUMULATE_WORDS = '''
+    INSERT INTO temp.analytics_words (vocab_id, learners, learned, practice_count, practice_correct)
+    SELECT vocab_id, COUNT(*), SUM(status = 'learned'), SUM(practice_count), SUM(practice_correct)
+    FROM progress WHERE user_id > ? AND user_id <= ?
+    GROUP BY vocab_id
+    ON CONFLICT (vocab_id) DO UPDATE SET
+        learners = learners + excluded.learners,
+        learned = learned + excluded.learned,
+        practice_count = practice_count + excluded.practice_count,
+        practice_correct = practice_correct + excluded.practice_correct
+'''
+ACCUMULATE_TOPICS = '''
+    INSERT INTO temp.analytics_topics (topic_id, learners)
+    SELECT v.topic_id, COUNT(DISTINCT p.user_id)
+    FROM progress p JOIN vocabularies v ON v.id = p.vocab_id
+    WHERE p.user_id > ? AND p.user_id <= ? AND v.topic_id IS NOT NULL
+    GROUP BY v.topic_id
+    ON CONFLICT (topic_id) DO UPDATE SET learners = learners + excluded.learners
+'''
+PUBLISH_WORDS = (
+    "UPDATE word_stats SET learners = 0, learned = 0, practice_count = 0, practice_correct = 0",
+    '''
+    INSERT INTO word_stats (vocab_id, learners, learned, practice_count, practice_correct)
+    SELECT vocab_id, learners, learned, practice_count, practice_correct FROM temp.analytics_words WHERE true
+    ON CONFLICT (vocab_id) DO UPDATE SET
+        learners = excluded.learners,
+        learned = excluded.learned,
+        practice_count = excluded.practice_count,
+        practice_correct = excluded.practice_correct
+    ''',
+)
+# Topic rows are rolled up from the (small) stats tables, never from quiz_attempts or progress
+PUBLISH_TOPICS = (
+    "DELETE FROM topic_stats",
+    '''
+    INSERT INTO topic_stats (topic_id, words, attempts, correct, learners, learned,
+                             practice_count, practice_correct)
+    SELECT t.id,
+           (SELECT COUNT(*) FROM vocabularies v WHERE v.topic_id = t.id),
+           COALESCE(w.attempts, 0) + COALESCE(q.attempts, 0),
+           COALESCE(w.correct, 0) + COALESCE(q.correct, 0),
+           COALESCE(l.learners, 0), COALESCE(w.learned, 0),
+           COALESCE(w.practice_count, 0), COALESCE(w.practice_correct, 0)
+    FROM topics t
+    LEFT JOIN (
+        SELECT v.topic_id, SUM(s.attempts) AS attempts, SUM(s.correct) AS correct, SUM(s.learned) AS learned,
+               SUM(s.practice_count) AS practice_count, SUM(s.practice_correct) AS practice_correct
+        FROM word_stats s JOIN vocabularies v ON v.id = s.vocab_id GROUP BY v.topic_id
+    ) w ON w.topic_id = t.id
+    LEFT JOIN (
+        SELECT q.topic_id, SUM(s.attempts) AS attempts, SUM(s.correct) AS correct
+        FROM quiz_stats s JOIN quizzes q ON q.id = s.quiz_id GROUP BY q.topic_id
+    ) q ON q.topic_id = t.id
+    LEFT JOIN temp.analytics_topics l ON l.topic_id = t.id
+    ''',
+)
+
+
+def run(db, chunk_size=50000, users_per_chunk=1000, full=False, on_progress=None):
+    # One batch run. Callers must not run two at once (the CLI holds a file lock).
+    started = time.perf_counter()
+    report = {'attempts': 0, 'chunks': 0, 'users': 0, 'watermark': 0, 'full': full}
+
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if full:
+            for table in ('word_stats', 'quiz_stats', 'topic_stats', 'analytics_watermark'):
+                conn.execute("DELETE FROM %s" % table)
+        row = conn.execute("SELECT last_id FROM analytics_watermark WHERE source = ?",
+                           (WATERMARK_SOURCE,)).fetchone()
+        last_id = row[0] if row else 0
+        # Rows inserted while the run is going are left for the next one
+        high = conn.execute("SELECT COALESCE(MAX(id), 0) FROM quiz_attempts").fetchone()[0]
+
+    while last_id < high:
+        upper = min(last_id + chunk_size, high)
+        with db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(FOLD_WORDS, (last_id, upper))
+            conn.execute(FOLD_QUIZZES, (last_id, upper))
+            conn.execute("""
+                INSERT INTO analytics_watermark (source, last_id, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (source) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at
+            """, (WATERMARK_SOURCE, upper))
+            report['attempts'] += conn.execute("SELECT COUNT(*) FROM quiz_attempts WHERE id > ? AND id <= ?",
+                                               (last_id, upper)).fetchone()[0]
+        last_id = upper
+        report['chunks'] += 1
+        if on_progress:
+            on_progress(report)
+    report['watermark'] = last_id
+
+    with db.connection() as conn:
+        for sql in PROGRESS_TEMP_TABLES:
+            conn.execute(sql)
+        conn.execute("DELETE FROM temp.analytics_words")
+        conn.execute("DELETE FROM temp.analytics_topics")
+        conn.commit()
+        last_user = 0
+        while True:
+            # Upper user id of the next range; each range commits so no read snapshot stays open
+            bounds = conn.execute("SELECT MAX(id), COUNT(*) FROM (SELECT id FROM users WHERE id > ? ORDER BY id LIMIT ?)",
+                                  (last_user, users_per_chunk)).fetchone()
+            if not bounds[1]:
+                break
+            conn.execute(ACCUMULATE_WORDS, (last_user, bounds[0]))
+            conn.execute(ACCUMULATE_TOPICS, (last_user, bounds[0]))
+            conn.commit()
+            last_user = bounds[0]
+            report['users'] += bounds[1]
+            if on_progress:
+                on_progress(report)
+
+        conn.execute("BEGIN IMMEDIATE")
+        for sql in PUBLISH_WORDS + PUBLISH_TOPICS:
+            conn.execute(sql)
+        conn.execute("""
+            INSERT INTO analytics_watermark (source, last_id, updated_at) VALUES ('progress', ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (source) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at
+        """, (last_user,))
+        conn.execute("DROP TABLE temp.analytics_words")
+        conn.execute("DROP TABLE temp.analytics_topics")
+
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _accuracy(correct, attempts):
+    return round(correct / attempts * 100, 2) if attempts else None
+
+
+def summary(conn, topic_id=None, min_attempts=5, limit=20):
+    # Reads only the precomputed tables (plus catalog rows for labels)
+    topic_filter, params = ('AND t.id = ?', [topic_id]) if topic_id is not None else ('', [])
+    topics = conn.execute("""
+        SELECT t.id, t.name, t.level, s.words, s.attempts, s.correct, s.learners, s.learned,
+               s.practice_count, s.practice_correct
+        FROM topic_stats s JOIN topics t ON t.id = s.topic_id
+        WHERE true %s ORDER BY t.id
+    """ % topic_filter, params).fetchall()
+
+    # Words are ranked on quiz answers and study-mode practice together
+    topic_filter = 'AND v.topic_id = ?' if topic_id is not None else ''
+    words = conn.execute("""
+        SELECT s.vocab_id, v.word, v.meaning, v.topic_id, s.attempts, s.correct, s.learners, s.learned,
+               s.practice_count, s.practice_correct
+        FROM word_stats s JOIN vocabularies v ON v.id = s.vocab_id
+        WHERE s.attempts + s.practice_count >= ? %s
+        ORDER BY CAST(s.correct + s.practice_correct AS REAL) / (s.attempts + s.practice_count), s.vocab_id
+        LIMIT ?
+    """ % topic_filter, [min_attempts] + params + [limit]).fetchall()
+
+    topic_filter = 'AND q.topic_id = ?' if topic_id is not None else ''
+    quizzes = conn.execute("""
+        SELECT s.quiz_id, q.question, q.topic_id, s.attempts, s.correct
+        FROM quiz_stats s JOIN quizzes q ON q.id = s.quiz_id
+        WHERE s.attempts >= ? %s
+        ORDER BY CAST(s.correct AS REAL) / s.attempts, s.quiz_id
+        LIMIT ?
+    """ % topic_filter, [min_attempts] + params + [limit]).fetchall()
+
+    watermarks = {source: (last_id, updated_at) for source, last_id, updated_at in conn.execute(
+        "SELECT source, last_id, updated_at FROM analytics_watermark")}
+    return {
+        'updated_at': watermarks.get('progress', (None, None))[1],
+        'watermark': watermarks.get(WATERMARK_SOURCE, (0, None))[0],
+        'topics': [{
+            'topic_id': t[0],
+            'name': t[1],
+            'level': t[2],
+            'words': t[3],
+            'attempts': t[4],
+            'accuracy': _accuracy(t[5], t[4]),
+            'learners': t[6],
+            'learned': t[7],
+            # Share of (learner, word) pairs in the topic that reached 'learned'
+            'mastery': round(t[7] / (t[6] * t[3]) * 100, 2) if t[6] and t[3] else None,
+            'practice_count': t[8],
+            'practice_accuracy': _accuracy(t[9], t[8]),
+        } for t in topics],
+        'hardest_words': [{
+            'vocab_id': w[0],
+            'word': w[1],
+            'meaning': w[2],
+            'topic_id': w[3],
+            'attempts': w[4],
+            'accuracy': _accuracy(w[5], w[4]),
+            'learners': w[6],
+            'learned': w[7],
+            'practice_count': w[8],
+            'practice_accuracy': _accuracy(w[9], w[8]),
+        } for w in words],
+        'hardest_questions': [{
+            'quiz_id': q[0],
+            'question': q[1],
+            'topic_id': q[2],
+            'attempts': q[3],
+            'accuracy': _accuracy(q[4], q[3]),
+        } for q in quizzes],
+    }
@@ -1,29 +1,555 @@
-from flask import Flask, request, jsonify, render_template, session
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, render_template, session
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import sqlite3
 import hashlib
 import jwt
 import datetime
+import gzip
+import hmac
+import io
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
+from contextlib import contextmanager
+from collections import OrderedDict
 import os
+import queue
+import threading
+import time
+import re
+import unicodedata
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to SQLite's own write lock
+    fcntl = None
+import analytics
+import click
+import content_io
+import math
+import metrics
+import ratelimit
+import scheduler
+from random_generator import RandomQuizGenerator
+from ranking import RankedBoard
+from write_behind import BufferClosed, BufferFull, WriteBehindBuffer
 
-app = Flask(__name__)
-app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'your-super-secret-key-here')
-CORS(app)
+_MISSING = object()
+
+class LRUCache:
+    # Thread-safe LRU with a size bound and per-entry TTL.
+    # `version` is bumped on every invalidation so loads that raced with a write are not stored.
+    # shared_version(), if given, is a version kept outside this process (see CatalogVersion);
+    # when it moves, everything cached here is dropped.
+    def __init__(self, max_entries=256, ttl=300, shared_version=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_version = shared_version
+        self._shared_seen = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+    
+    def _sync(self):
+        if self.shared_version is None:
+            return
+        version = self.shared_version()
+        if version != self._shared_seen:
+            if self._shared_seen is not None:
+                self.invalidate()
+            self._shared_seen = version
+    
+    def get(self, key, default=None):
+        self._sync()
+        with self._lock:
+            return self._lookup(key, default)
+    
+    def _lookup(self, key, default):
+        entry = self._entries.get(key)
+        if entry is not None and (self.ttl is None or entry[1] > time.monotonic()):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return default
+    
+    def set(self, key, value, version=None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_load(self, key, loader):
+        # Single flight: concurrent misses on one key wait for the first caller's load
+        # (and share its result or exception) instead of each running the loader
+        self._sync()
+        with self._lock:
+            value = self._lookup(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            flight = self._loading.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._loading[key] = Future()
+                version = self.version
+            else:
+                self.coalesced += 1
+        if not leader:
+            return flight.result()
+        try:
+            value = loader()
+            self.set(key, value, version)
+            flight.set_result(value)
+            return value
+        except BaseException as error:
+            flight.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                if self._loading.get(key) is flight:
+                    del self._loading[key]
+    
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            # Loads already running read pre-invalidation data; later callers must not join them
+            self._loading.clear()
+            self.version += 1
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self.version,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'coalesced': self.coalesced,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+class CatalogVersion:
+    # The catalog_version row, re-read at most every `interval` seconds (or on demand with force=True).
+    # In-process counters only see this worker's writes; this one sees every process's.
+    def __init__(self, db, interval=1.0):
+        self.db = db
+        self.interval = interval
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def current(self, force=False):
+        if not force and self._version is not None and time.monotonic() - self._checked_at < self.interval:
+            return self._version
+        with self._lock:
+            if force or self._version is None or time.monotonic() - self._checked_at >= self.interval:
+                with self.db.connection() as conn:
+                    self._version = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+                self._checked_at = time.monotonic()
+            return self._version
+
+def cached(cache, key, loader):
+    if cache is None:
+        return loader()
+    return cache.get_or_load(key, loader)
+
+# Password hashing: salted scrypt stored as "scrypt$n$r$p$salt$hash".
+# Rows created before this scheme hold a bare SHA-256 hex digest and are upgraded on the next login.
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+SCRYPT_MAXMEM = 64 * 1024 * 1024
+
+def hash_password(password, salt=None):
+    salt = salt or os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P,
+                            maxmem=SCRYPT_MAXMEM, dklen=32)
+    return 'scrypt$%d$%d$%d$%s$%s' % (SCRYPT_N, SCRYPT_R, SCRYPT_P, salt.hex(), digest.hex())
+
+def verify_password(password, stored):
+    # Returns (matches, needs_rehash)
+    if not stored.startswith('scrypt$'):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored), True
+    _, n, r, p, salt, expected = stored.split('$')
+    digest = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p),
+                            maxmem=SCRYPT_MAXMEM, dklen=32)
+    matches = hmac.compare_digest(digest.hex(), expected)
+    return matches, (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+class PasswordHasher:
+    # Runs the KDF on a small dedicated pool so a burst of logins cannot take every request
+    # worker's CPU and scrypt memory at once
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._dummy_hash = None
+    
+    @property
+    def dummy_hash(self):
+        # Compared against when the username does not exist, so both paths cost one KDF run.
+        # Built on first use rather than at import, where it would add a KDF run to every worker boot.
+        if self._dummy_hash is None:
+            self._dummy_hash = hash_password(os.urandom(16).hex())
+        return self._dummy_hash
+    
+    def hash(self, password):
+        return self.executor.submit(hash_password, password).result()
+    
+    def verify(self, password, stored):
+        return self.executor.submit(verify_password, password, stored or self.dummy_hash).result()
+
+# Vocabulary search folding. FTS5's remove_diacritics handles "ố" -> "o", but "đ" is a letter of its own,
+# so it is mapped to "d" both in the indexed text (SQL) and in queries (Python).
+def fold_sql(column):
+    return "replace(replace(%s, 'đ', 'd'), 'Đ', 'D')" % column
+
+def fold_text(text):
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if not unicodedata.combining(c)).lower()
+
+def parse_int(value):
+    # int() for request values that get bound into SQL: SQLite raises OverflowError past 64 bits
+    value = int(value)
+    if not -content_io.MAX_INTEGER - 1 <= value <= content_io.MAX_INTEGER:
+        raise ValueError(value)
+    return value
+
+@contextmanager
+def file_lock(path):
+    # Exclusive advisory lock across processes (gunicorn workers, CLI); BEGIN IMMEDIATE alone
+    # would make waiters give up after busy_timeout while a long migration runs
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
 
 # Database Models (OOP approach)
 class Database:
-    def __init__(self, db_name='english_app.db'):
+    # Applied to every connection we open; journal_mode=WAL is persistent and set once in init_database
+    PRAGMAS = (
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -16000),     # ~16MB page cache per connection
+        ('mmap_size', 268435456),   # 256MB memory-mapped reads
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', 5000),
+    )
+    STATEMENT_CACHE_SIZE = 256
+    
+    # Ordered schema migrations: (version, description, steps). Each step is SQL or a callable(cursor);
+    # applied versions are recorded in schema_version so start-up is idempotent.
+    MIGRATIONS = [
+        (1, 'Index topic/user lookups and make progress unique per word', [
+            "CREATE INDEX IF NOT EXISTS idx_vocabularies_topic ON vocabularies (topic_id)",
+            "CREATE INDEX IF NOT EXISTS idx_quizzes_topic ON quizzes (topic_id)",
+            # Keep the newest row per (user_id, vocab_id) before enforcing uniqueness
+            "DELETE FROM progress WHERE id NOT IN (SELECT MAX(id) FROM progress GROUP BY user_id, vocab_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_progress_user_vocab ON progress (user_id, vocab_id)",
+            "CREATE INDEX IF NOT EXISTS idx_results_user_completed ON results (user_id, completed_at, score)",
+        ]),
+        (2, 'Materialised per-user stats for /api/progress', [
+            '''
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id INTEGER PRIMARY KEY,
+                learned_words INTEGER NOT NULL DEFAULT 0,
+                quizzes_taken INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                current_streak INTEGER NOT NULL DEFAULT 0,
+                longest_streak INTEGER NOT NULL DEFAULT 0,
+                last_active_date TEXT,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            ''',
+            lambda cursor: UserStats.backfill(cursor),
+        ]),
+        (3, 'Spaced-repetition state and due-date index on progress', [
+            "ALTER TABLE progress ADD COLUMN ease_factor REAL NOT NULL DEFAULT %s" % scheduler.DEFAULT_EASE,
+            "ALTER TABLE progress ADD COLUMN interval_days INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE progress ADD COLUMN repetitions INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE progress ADD COLUMN due_at TIMESTAMP",
+            # Words already in progress are due for their first scheduled review straight away
+            "UPDATE progress SET due_at = COALESCE(last_reviewed, CURRENT_TIMESTAMP) WHERE due_at IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_progress_user_due ON progress (user_id, due_at)",
+        ]),
+        (4, 'Per-question quiz attempts', [
+            '''
+            CREATE TABLE IF NOT EXISTS quiz_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                result_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                quiz_id INTEGER,
+                vocab_id INTEGER,
+                answer TEXT,
+                is_correct INTEGER NOT NULL,
+                FOREIGN KEY (result_id) REFERENCES results (id),
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                FOREIGN KEY (quiz_id) REFERENCES quizzes (id),
+                FOREIGN KEY (vocab_id) REFERENCES vocabularies (id)
+            )
+            ''',
+            "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_result ON quiz_attempts (result_id)",
+        ]),
+        (5, 'Full-text vocabulary search', [
+            '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS vocabularies_fts USING fts5(
+                word, meaning, example,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS vocabularies_fts_insert AFTER INSERT ON vocabularies BEGIN
+                INSERT INTO vocabularies_fts (rowid, word, meaning, example)
+                VALUES (new.id, new.word, %s, new.example);
+            END
+            ''' % fold_sql('new.meaning'),
+            '''
+            CREATE TRIGGER IF NOT EXISTS vocabularies_fts_delete AFTER DELETE ON vocabularies BEGIN
+                DELETE FROM vocabularies_fts WHERE rowid = old.id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS vocabularies_fts_update AFTER UPDATE ON vocabularies BEGIN
+                DELETE FROM vocabularies_fts WHERE rowid = old.id;
+                INSERT INTO vocabularies_fts (rowid, word, meaning, example)
+                VALUES (new.id, new.word, %s, new.example);
+            END
+            ''' % fold_sql('new.meaning'),
+            "INSERT INTO vocabularies_fts (rowid, word, meaning, example) "
+            "SELECT id, word, %s, example FROM vocabularies" % fold_sql('meaning'),
+        ]),
+        (6, 'Precomputed leaderboards', [
+            '''
+            CREATE TABLE IF NOT EXISTS leaderboard (
+                board TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                score_sum REAL NOT NULL DEFAULT 0,
+                quizzes INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (board, user_id),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            ) WITHOUT ROWID
+            ''',
+            lambda cursor: Leaderboard.backfill(cursor),
+        ]),
+        (7, 'Practice counters on progress', [
+            "ALTER TABLE progress ADD COLUMN practice_count INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE progress ADD COLUMN practice_correct INTEGER NOT NULL DEFAULT 0",
+        ]),
+        (8, 'Precomputed analytics tables (filled by `flask analytics`)', [
+            '''
+            CREATE TABLE IF NOT EXISTS word_stats (
+                vocab_id INTEGER PRIMARY KEY,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0,
+                learners INTEGER NOT NULL DEFAULT 0,
+                learned INTEGER NOT NULL DEFAULT 0,
+                practice_count INTEGER NOT NULL DEFAULT 0,
+                practice_correct INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS quiz_stats (
+                quiz_id INTEGER PRIMARY KEY,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS topic_stats (
+                topic_id INTEGER PRIMARY KEY,
+                words INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0,
+                learners INTEGER NOT NULL DEFAULT 0,
+                learned INTEGER NOT NULL DEFAULT 0,
+                practice_count INTEGER NOT NULL DEFAULT 0,
+                practice_correct INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS analytics_watermark (
+                source TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP
+            )
+            ''',
+        ]),
+        (9, 'Shared catalog version bumped on every topic/vocabulary/quiz write', [
+            '''
+            CREATE TABLE IF NOT EXISTS catalog_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            ''',
+            "INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)",
+        ] + [
+            # Triggers, so writes from any process (other workers, the import CLI, manual SQL) count
+            '''
+            CREATE TRIGGER IF NOT EXISTS %s_catalog_version_%s AFTER %s ON %s BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+            ''' % (table, event.lower(), event, table)
+            for table in ('topics', 'vocabularies', 'quizzes') for event in ('INSERT', 'UPDATE', 'DELETE')
+        ]),
+        (10, 'Case-insensitive index on vocabulary words for exact/prefix search', [
+            "CREATE INDEX IF NOT EXISTS idx_vocabularies_word ON vocabularies (word COLLATE NOCASE)",
+        ]),
+    ]
+
+    def __init__(self, db_name='english_app.db', pool_size=None, pooled=True):
         self.db_name = os.path.join(os.getcwd(), db_name)
-        self.init_database()
+        self.pool_size = pool_size or int(os.environ.get('DB_POOL_SIZE', 8))
+        self.pooled = pooled
+        self._pool_lock = threading.Lock()
+        self._reset_pool()
+        # Schema work is deferred to the first connection (or `flask migrate` / the gunicorn
+        # on_starting hook), so importing the app does not touch the database
+        self._ready = False
+        self._schema_lock = threading.Lock()
+    
+    @property
+    def schema_version(self):
+        return max([version for version, _, _ in self.MIGRATIONS] or [0])
+    
+    def _reset_pool(self):
+        self._pid = os.getpid()
+        self._pool = queue.LifoQueue(maxsize=self.pool_size)
     
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
+        # Standalone connection owned (and closed) by the caller
+        if not self._ready:
+            self.ensure_schema()
+        return self._open()
+    
+    def _open(self):
+        conn = sqlite3.connect(self.db_name, check_same_thread=False,
+                               cached_statements=self.STATEMENT_CACHE_SIZE,
+                               factory=metrics.TracedConnection if metrics.ENABLED else sqlite3.Connection)
+        for name, value in self.PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+    
+    def _acquire(self):
+        if not self.pooled:
+            return self._open()
+        if self._pid != os.getpid():
+            # Forked gunicorn worker: never reuse sqlite handles inherited from the parent
+            with self._pool_lock:
+                if self._pid != os.getpid():
+                    self._reset_pool()
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._open()
+    
+    def _release(self, conn):
+        if not self.pooled:
+            conn.close()
+            return
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    @contextmanager
+    def connection(self):
+        # Borrow a pooled connection; commits on success, rolls back on error
+        if not self._ready:
+            self.ensure_schema()
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+    
+    def close_all(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+    
+    def ensure_schema(self):
+        # Fast path is a single header read: PRAGMA user_version is set to the latest migration
+        # once init_database has run against this file
+        with self._schema_lock, metrics.untraced():
+            if self._ready:
+                return
+            conn = self._open()
+            try:
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+            finally:
+                conn.close()
+            if current < self.schema_version or self.schema_version == 0:
+                with file_lock(self.db_name + '.migrate.lock'):
+                    self.init_database()
+            self._ready = True
     
     def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        conn = self._open()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Take the write lock up front so workers booting together apply migrations exactly once
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            self._create_tables(cursor)
+            self.migrate(cursor)
+            # Insert sample data
+            cursor.execute("SELECT COUNT(*) FROM topics")
+            if cursor.fetchone()[0] == 0:
+                self._insert_sample_rows(cursor)
+            cursor.execute("PRAGMA user_version = %d" % self.schema_version)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def migrate(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cursor.fetchone()[0]
         
+        for version, description, steps in self.MIGRATIONS:
+            if version <= current:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                          (version, description))
+    
+    def _create_tables(self, cursor):
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -101,23 +627,8 @@ class Database:
                 FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-        
-        # Insert sample data
-        self.insert_sample_data()
     
-    def insert_sample_data(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM topics")
-        if cursor.fetchone()[0] > 0:
-            conn.close()
-            return
-        
+    def _insert_sample_rows(self, cursor):
         # Sample topics với tiếng Việt
         topics = [
             ('Gia đình', 'A1', 'Từ vựng cơ bản về gia đình'),
@@ -279,50 +790,46 @@ class Database:
         cursor.executemany("INSERT INTO quizzes (topic_id, question, option_a, option_b, option_c, option_d, correct_answer) VALUES (?, ?, ?, ?, ?, ?, ?)", quizzes)
         
         # Create admin user
-        admin_password = hashlib.sha256('admin123'.encode()).hexdigest()
+        admin_password = hash_password('admin123')
         cursor.execute("INSERT INTO users (username, email, password, role) VALUES (?, ?, ?, ?)", 
                       ('admin', 'admin@example.com', admin_password, 'admin'))
-        
-        conn.commit()
-        conn.close()
 
+@metrics.instrument
 class User:
-    def __init__(self, db):
+    def __init__(self, db, hasher):
         self.db = db
+        self.hasher = hasher
     
     def register(self, username, email, password):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            hashed_password = hashlib.sha256(password.encode()).hexdigest()
-            cursor.execute("INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
-                          (username, email, hashed_password))
-            conn.commit()
-            user_id = cursor.lastrowid
-            conn.close()
+            hashed_password = self.hasher.hash(password)
+            with self.db.connection() as conn:
+                cursor = conn.execute("INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
+                                      (username, email, hashed_password))
+                user_id = cursor.lastrowid
             return {'success': True, 'user_id': user_id}
         except sqlite3.IntegrityError:
-            conn.close()
             return {'success': False, 'message': 'Tên đăng nhập hoặc email đã tồn tại'}
     
     def login(self, username, password):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        with self.db.connection() as conn:
+            user = conn.execute("SELECT id, username, email, role, password FROM users WHERE username = ?",
+                                (username,)).fetchone()
         
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
-        cursor.execute("SELECT id, username, email, role FROM users WHERE username = ? AND password = ?",
-                      (username, hashed_password))
-        user = cursor.fetchone()
-        conn.close()
-        
-        if user:
+        matches, needs_rehash = self.hasher.verify(password, user[4] if user else None)
+        if user and matches:
+            if needs_rehash:
+                new_hash = self.hasher.hash(password)
+                with self.db.connection() as conn:
+                    conn.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                                 (new_hash, user[0], user[4]))
+            
             token = jwt.encode({
                 'user_id': user[0],
                 'username': user[1],
                 'role': user[3],
                 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-            }, app.secret_key, algorithm='HS256')
+            }, current_app.secret_key, algorithm='HS256')
             
             return {
                 'success': True,
@@ -336,40 +843,102 @@ class User:
             }
         return {'success': False, 'message': 'Tên đăng nhập hoặc mật khẩu không đúng'}
 
+@metrics.instrument
 class Topic:
-    def __init__(self, db):
+    def __init__(self, db, cache=None):
         self.db = db
+        self.cache = cache
     
     def get_all(self):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM topics")
-        topics = cursor.fetchall()
-        conn.close()
+        return cached(self.cache, ('topics',), self._load_all)
+    
+    def _load_all(self):
+        with self.db.connection() as conn:
+            topics = conn.execute("SELECT * FROM topics").fetchall()
         
         return [{'id': t[0], 'name': t[1], 'level': t[2], 'description': t[3]} for t in topics]
     
     def get_by_id(self, topic_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM topics WHERE id = ?", (topic_id,))
-        topic = cursor.fetchone()
-        conn.close()
+        return cached(self.cache, ('topic', topic_id), lambda: self._load_by_id(topic_id))
+    
+    def _load_by_id(self, topic_id):
+        with self.db.connection() as conn:
+            topic = conn.execute("SELECT * FROM topics WHERE id = ?", (topic_id,)).fetchone()
         
         if topic:
             return {'id': topic[0], 'name': topic[1], 'level': topic[2], 'description': topic[3]}
         return None
+    
+    # Column expressions allowed in a bundle projection, keyed by response field
+    TOPIC_FIELDS = {'id': 't.id', 'name': 't.name', 'level': 't.level', 'description': 't.description'}
+    VOCABULARY_FIELDS = {
+        'id': 'id', 'word': 'word', 'meaning': 'meaning', 'example': 'example',
+        'pronunciation': 'pronunciation', 'topic_id': 'topic_id'
+    }
+    QUIZ_FIELDS = {
+        'id': 'id', 'topic_id': 'topic_id', 'question': 'question',
+        'options': "json_object('A', option_a, 'B', option_b, 'C', option_c, 'D', option_d)",
+        'correct_answer': 'correct_answer'
+    }
+    
+    def get_bundle(self, topic_ids=None, fields=None, limit=20, offset=0):
+        # Topics with their vocabularies and quizzes in one round trip.
+        # fields: {'name': None, 'vocabularies': {'word', 'meaning'}, 'quizzes': None, ...};
+        # None selects every column of that part.
+        if fields is None:
+            fields = {name: None for name in list(self.TOPIC_FIELDS) + ['vocabularies', 'quizzes']}
+        
+        columns = [self.TOPIC_FIELDS[name] for name in self.TOPIC_FIELDS if name in fields]
+        names = [name for name in self.TOPIC_FIELDS if name in fields]
+        for name, table, allowed in (('vocabularies', 'vocabularies', self.VOCABULARY_FIELDS),
+                                     ('quizzes', 'quizzes', self.QUIZ_FIELDS)):
+            if name not in fields:
+                continue
+            selected = fields[name] or allowed
+            pairs = ', '.join("'%s', %s" % (key, allowed[key]) for key in allowed if key in selected)
+            columns.append("(SELECT json_group_array(json(item)) FROM "
+                           "(SELECT json_object(%s) AS item FROM %s WHERE topic_id = t.id ORDER BY id))"
+                           % (pairs, table))
+            names.append(name)
+        
+        where, params = '', []
+        if topic_ids:
+            where = 'WHERE t.id IN (%s)' % ', '.join('?' * len(topic_ids))
+            params.extend(topic_ids)
+        
+        query = "SELECT COUNT(*) OVER () AS total, %s FROM topics t %s ORDER BY t.id LIMIT ? OFFSET ?" % (
+            ', '.join(columns), where)
+        with self.db.connection() as conn:
+            rows = conn.execute(query, params + [limit, offset]).fetchall()
+            if rows:
+                total = rows[0][0]
+            else:
+                total = conn.execute("SELECT COUNT(*) FROM topics t %s" % where, params).fetchone()[0]
+        
+        topics = []
+        for row in rows:
+            topic = {}
+            for name, value in zip(names, row[1:]):
+                topic[name] = json.loads(value) if name in ('vocabularies', 'quizzes') else value
+            topics.append(topic)
+        return {'topics': topics, 'total': total, 'limit': limit, 'offset': offset}
 
+@metrics.instrument
 class Vocabulary:
-    def __init__(self, db):
+    RANK_CANDIDATES = 500
+    # Deeper pages cost O(offset) rows and bound parameters; autocomplete never goes this far
+    SEARCH_MAX_OFFSET = 500
+    
+    def __init__(self, db, cache=None):
         self.db = db
+        self.cache = cache
     
     def get_by_topic(self, topic_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vocabularies WHERE topic_id = ?", (topic_id,))
-        vocabularies = cursor.fetchall()
-        conn.close()
+        return cached(self.cache, ('vocabularies', topic_id), lambda: self._load_by_topic(topic_id))
+    
+    def _load_by_topic(self, topic_id):
+        with self.db.connection() as conn:
+            vocabularies = conn.execute("SELECT * FROM vocabularies WHERE topic_id = ?", (topic_id,)).fetchall()
         
         return [{
             'id': v[0],
@@ -379,17 +948,117 @@ class Vocabulary:
             'pronunciation': v[4],
             'topic_id': v[5]
         } for v in vocabularies]
+    
+    def search(self, query, prefix=True, topic_id=None, limit=20, offset=0):
+        # Ranked full-text search; with prefix=True the last term also matches as a prefix (autocomplete)
+        terms = re.findall(r'\w+', fold_text(query))
+        if not terms:
+            return {'results': [], 'has_more': False, 'limit': limit, 'offset': offset}
+        match = ' '.join('"%s"' % term for term in terms)
+        if prefix:
+            match += '*'
+        wanted = offset + limit + 1
+        
+        with self.db.connection() as conn:
+            # Words equal to (or, with prefix, starting with) the query come first, in alphabetical order,
+            # straight off idx_vocabularies_word. They usually fill an autocomplete page on their own.
+            text = ' '.join(query.split())
+            sql = "SELECT id, word, meaning, example, pronunciation, topic_id FROM vocabularies WHERE "
+            if prefix:
+                sql += "word >= ? COLLATE NOCASE AND word < ? COLLATE NOCASE"
+                params = [text, text + '\U0010ffff']
+            else:
+                sql += "word = ? COLLATE NOCASE"
+                params = [text]
+            if topic_id is not None:
+                sql += " AND topic_id = ?"
+                params.append(topic_id)
+            rows = conn.execute(sql + " ORDER BY word COLLATE NOCASE, id LIMIT ?", params + [wanted]).fetchall()
+            
+            if len(rows) < wanted:
+                # Then the rest by bm25: word matches outrank meaning matches, which outrank example
+                # sentences. Broad terms can match a large share of the corpus, so bm25 only scores the
+                # first RANK_CANDIDATES matches; ranking is exact for every query narrower than that.
+                ranked = "SELECT rowid, bm25(vocabularies_fts, 10.0, 5.0, 1.0) AS score FROM vocabularies_fts " \
+                         "WHERE vocabularies_fts MATCH ?"
+                params = [match]
+                if topic_id is None:
+                    ranked += " LIMIT ?"
+                    params.append(max(self.RANK_CANDIDATES, wanted + len(rows)))
+                sql = """
+                    SELECT v.id, v.word, v.meaning, v.example, v.pronunciation, v.topic_id
+                    FROM (%s) f
+                    JOIN vocabularies v ON v.id = f.rowid
+                    WHERE v.id NOT IN (%s)
+                """ % (ranked, ', '.join('?' * len(rows)))
+                params.extend(row[0] for row in rows)
+                if topic_id is not None:
+                    sql += " AND v.topic_id = ?"
+                    params.append(topic_id)
+                sql += " ORDER BY f.score LIMIT ?"
+                params.append(wanted - len(rows))
+                rows += conn.execute(sql, params).fetchall()
+        
+        page = rows[offset:]
+        return {
+            'results': [{
+                'id': v[0],
+                'word': v[1],
+                'meaning': v[2],
+                'example': v[3],
+                'pronunciation': v[4],
+                'topic_id': v[5]
+            } for v in page[:limit]],
+            'has_more': len(page) > limit,
+            'limit': limit,
+            'offset': offset
+        }
+
+class AnswerKey:
+    # quiz_id -> correct option and vocab_id -> meaning, held in memory and
+    # reloaded whenever the catalog version changes. version(force) returns that version;
+    # force=True skips any caching of the version itself.
+    def __init__(self, db, version=lambda force=False: 0):
+        self.db = db
+        self._version = version
+        self._keys = None
+        self._keys_version = None
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        with self.db.connection() as conn:
+            quizzes = dict(conn.execute("SELECT id, correct_answer FROM quizzes").fetchall())
+            meanings = dict(conn.execute("SELECT id, meaning FROM vocabularies").fetchall())
+        return quizzes, meanings
+    
+    def keys(self, fresh=False):
+        # fresh=True: re-check the version now, for ids the current key does not know yet
+        version = self._version(fresh)
+        keys = self._keys
+        if keys is None or self._keys_version != version:
+            with self._lock:
+                if self._keys is None or self._keys_version != version:
+                    self._keys = self._load()
+                    self._keys_version = version
+                keys = self._keys
+        return keys
 
+@metrics.instrument
 class Quiz:
-    def __init__(self, db):
+    MAX_ANSWERS = 500
+    
+    def __init__(self, db, cache=None, leaderboard=None, catalog_version=None):
         self.db = db
+        self.cache = cache
+        self.leaderboard = leaderboard
+        self.answer_key = AnswerKey(db, catalog_version.current if catalog_version else (lambda force=False: 0))
     
     def get_by_topic(self, topic_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM quizzes WHERE topic_id = ?", (topic_id,))
-        quizzes = cursor.fetchall()
-        conn.close()
+        return cached(self.cache, ('quiz', topic_id), lambda: self._load_by_topic(topic_id))
+    
+    def _load_by_topic(self, topic_id):
+        with self.db.connection() as conn:
+            quizzes = conn.execute("SELECT * FROM quizzes WHERE topic_id = ?", (topic_id,)).fetchall()
         
         return [{
             'id': q[0],
@@ -404,30 +1073,419 @@ class Quiz:
             'correct_answer': q[7]
         } for q in quizzes]
     
-    def submit_result(self, user_id, quiz_results):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+    def submit_result(self, user_id, answers):
+        # answers: [(quiz_id, vocab_id, answer)] with exactly one of quiz_id / vocab_id set.
+        # Quiz questions are answered with an option letter, generated questions with the chosen meaning.
+        quiz_key, meaning_key = self.answer_key.keys()
+        # Questions added since the key was loaded (possibly by another process): check before rejecting
+        if any(quiz_id not in quiz_key if quiz_id is not None else vocab_id not in meaning_key
+               for quiz_id, vocab_id, _ in answers):
+            quiz_key, meaning_key = self.answer_key.keys(fresh=True)
+        attempts, details = [], []
+        for quiz_id, vocab_id, answer in answers:
+            if quiz_id is not None:
+                if quiz_id not in quiz_key:
+                    return {'success': False, 'message': 'Câu hỏi không tồn tại: %s' % quiz_id}
+                correct_answer = quiz_key[quiz_id]
+            else:
+                if vocab_id not in meaning_key:
+                    return {'success': False, 'message': 'Không tìm thấy từ vựng: %s' % vocab_id}
+                correct_answer = meaning_key[vocab_id]
+            is_correct = answer == correct_answer
+            attempts.append((user_id, quiz_id, vocab_id, answer, int(is_correct)))
+            details.append({'quiz_id': quiz_id, 'vocab_id': vocab_id,
+                            'is_correct': is_correct, 'correct_answer': correct_answer})
         
-        total_questions = len(quiz_results)
-        correct_answers = sum(1 for result in quiz_results if result['is_correct'])
+        total_questions = len(attempts)
+        correct_answers = sum(attempt[4] for attempt in attempts)
         score = (correct_answers / total_questions) * 100
         
-        quiz_id_to_save = quiz_results[0]['quiz_id'] if quiz_results else 0
+        quiz_id_to_save = next((quiz_id for quiz_id, _, _ in answers if quiz_id is not None), 0)
         
-        cursor.execute("INSERT INTO results (user_id, quiz_id, score, total_questions) VALUES (?, ?, ?, ?)",
-                      (user_id, quiz_id_to_save, score, total_questions))
+        with self.db.connection() as conn:
+            result_id = conn.execute("INSERT INTO results (user_id, quiz_id, score, total_questions) VALUES (?, ?, ?, ?)",
+                                     (user_id, quiz_id_to_save, score, total_questions)).lastrowid
+            conn.executemany("INSERT INTO quiz_attempts (result_id, user_id, quiz_id, vocab_id, answer, is_correct) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", [(result_id,) + attempt for attempt in attempts])
+            UserStats.record_activity(conn, user_id, quizzes=1, score=score)
+            standings = Leaderboard.record(conn, user_id, score,
+                                           [quiz_id for quiz_id, _, _ in answers if quiz_id is not None],
+                                           [vocab_id for _, vocab_id, _ in answers if vocab_id is not None])
+        if self.leaderboard:
+            self.leaderboard.apply(standings)
         
-        conn.commit()
-        conn.close()
+        return {'success': True, 'result_id': result_id, 'score': score, 'correct': correct_answers,
+                'total': total_questions, 'answers': details}
+
+@metrics.instrument
+class UserStats:
+    # Per-user counters behind /api/progress. Every write to results/progress must call
+    # record_activity on the same connection so the stats commit (or roll back) with it.
+    def __init__(self, db):
+        self.db = db
+    
+    @staticmethod
+    def record_activity(conn, user_id, quizzes=0, score=0, learned_words=0):
+        # Streaks count consecutive UTC days with any activity, in the same clock as CURRENT_TIMESTAMP
+        conn.execute("""
+            INSERT INTO user_stats (user_id, learned_words, quizzes_taken, score_sum,
+                                    current_streak, longest_streak, last_active_date)
+            VALUES (?, ?, ?, ?, 1, 1, date('now'))
+            ON CONFLICT (user_id) DO UPDATE SET
+                learned_words = learned_words + excluded.learned_words,
+                quizzes_taken = quizzes_taken + excluded.quizzes_taken,
+                score_sum = score_sum + excluded.score_sum,
+                current_streak = CASE
+                    WHEN last_active_date = date('now') THEN current_streak
+                    WHEN last_active_date = date('now', '-1 day') THEN current_streak + 1
+                    ELSE 1 END,
+                longest_streak = MAX(longest_streak, CASE
+                    WHEN last_active_date = date('now') THEN current_streak
+                    WHEN last_active_date = date('now', '-1 day') THEN current_streak + 1
+                    ELSE 1 END),
+                last_active_date = date('now')
+        """, (user_id, learned_words, quizzes, score))
+    
+    @staticmethod
+    def backfill(cursor):
+        # Rebuild user_stats from the raw results/progress history
+        cursor.execute("DELETE FROM user_stats")
+        cursor.execute("""
+            INSERT INTO user_stats (user_id, learned_words, quizzes_taken, score_sum)
+            SELECT u.id,
+                   (SELECT COUNT(DISTINCT p.vocab_id) FROM progress p WHERE p.user_id = u.id),
+                   (SELECT COUNT(*) FROM results r WHERE r.user_id = u.id),
+                   (SELECT COALESCE(SUM(r.score), 0) FROM results r WHERE r.user_id = u.id)
+            FROM users u
+        """)
+        
+        # Streaks: walk each user's distinct activity days in order
+        days = cursor.connection.execute("""
+            SELECT user_id, date(completed_at) AS day FROM results
+            UNION
+            SELECT user_id, date(last_reviewed) AS day FROM progress
+            ORDER BY user_id, day
+        """)
+        updates = []
+        user_id, current, longest, last_day = None, 0, 0, None
+        for row_user, day in days:
+            if day is None:
+                continue
+            if row_user != user_id:
+                if user_id is not None:
+                    updates.append((current, longest, last_day.isoformat(), user_id))
+                user_id, current, longest, last_day = row_user, 0, 0, None
+            day = datetime.date.fromisoformat(day)
+            current = current + 1 if last_day and day - last_day == datetime.timedelta(days=1) else 1
+            longest = max(longest, current)
+            last_day = day
+        if user_id is not None:
+            updates.append((current, longest, last_day.isoformat(), user_id))
+        cursor.executemany("UPDATE user_stats SET current_streak = ?, longest_streak = ?, last_active_date = ? "
+                           "WHERE user_id = ?", updates)
+        return cursor.connection.execute("SELECT COUNT(*) FROM user_stats").fetchone()[0]
+    
+    def get(self, user_id):
+        with self.db.connection() as conn:
+            row = conn.execute("""
+                SELECT learned_words, quizzes_taken, score_sum, current_streak, longest_streak, last_active_date
+                FROM user_stats WHERE user_id = ?
+            """, (user_id,)).fetchone()
         
-        return {'score': score, 'correct': correct_answers, 'total': total_questions}
+        if not row:
+            return {'learned_words': 0, 'average_score': 0, 'quizzes_taken': 0,
+                    'current_streak': 0, 'longest_streak': 0}
+        
+        # A streak whose last active day is before yesterday has been broken
+        current_streak = row[3]
+        yesterday = (datetime.datetime.utcnow().date() - datetime.timedelta(days=1)).isoformat()
+        if row[5] is None or row[5] < yesterday:
+            current_streak = 0
+        return {
+            'learned_words': row[0],
+            'average_score': round(row[2] / row[1], 2) if row[1] else 0,
+            'quizzes_taken': row[1],
+            'current_streak': current_streak,
+            'longest_streak': row[4]
+        }
+
+@metrics.instrument
+class Leaderboard:
+    # Per-board (score_sum, quizzes) totals kept in the `leaderboard` table, written in the same
+    # transaction as the result. Boards are 'global', 'week:<YYYY-WW>' and 'topic:<id>'; each one
+    # is served from an in-memory RankedBoard that is reloaded from the table after `ttl` seconds,
+    # so other workers' submissions show up within that window.
+    MAX_LIMIT = 100
+    
+    def __init__(self, db, max_boards=64, ttl=30):
+        self.db = db
+        self.boards = LRUCache(max_boards, ttl)
+    
+    @staticmethod
+    def week_board(now=None):
+        # Monday-based week number, same as SQLite's strftime('%W')
+        return 'week:' + (now or datetime.datetime.utcnow()).strftime('%Y-%W')
+    
+    @staticmethod
+    def record(conn, user_id, score, quiz_ids=(), vocab_ids=()):
+        # Returns [(board, user_id, score_sum, quizzes)] as committed, for apply()
+        boards = ['global', Leaderboard.week_board()]
+        topic_ids = conn.execute(
+            "SELECT topic_id FROM quizzes WHERE id IN (%s) UNION SELECT topic_id FROM vocabularies WHERE id IN (%s)"
+            % (', '.join('?' * len(quiz_ids)), ', '.join('?' * len(vocab_ids))),
+            list(quiz_ids) + list(vocab_ids)).fetchall()
+        # Quizzes mixing several topics only count towards the global and weekly boards
+        if len(topic_ids) == 1:
+            boards.append('topic:%d' % topic_ids[0][0])
+        return [conn.execute('''
+            INSERT INTO leaderboard (board, user_id, score_sum, quizzes) VALUES (?, ?, ?, 1)
+            ON CONFLICT (board, user_id) DO UPDATE SET
+                score_sum = score_sum + excluded.score_sum,
+                quizzes = quizzes + 1
+            RETURNING board, user_id, score_sum, quizzes
+        ''', (board, user_id, score)).fetchone() for board in boards]
+    
+    @staticmethod
+    def backfill(cursor):
+        # Rebuild every board from results; a result's topic is its quiz's topic, or the single
+        # topic of its answered words for generated quizzes
+        cursor.execute("DELETE FROM leaderboard")
+        cursor.execute('''
+            WITH scored AS (
+                SELECT r.user_id, r.score, strftime('%Y-%W', r.completed_at) AS week,
+                       COALESCE(q.topic_id, (
+                           SELECT CASE WHEN COUNT(DISTINCT v.topic_id) = 1 THEN MIN(v.topic_id) END
+                           FROM quiz_attempts a JOIN vocabularies v ON v.id = a.vocab_id
+                           WHERE a.result_id = r.id)) AS topic_id
+                FROM results r LEFT JOIN quizzes q ON q.id = r.quiz_id
+                WHERE r.user_id IS NOT NULL AND r.score IS NOT NULL
+            )
+            INSERT INTO leaderboard (board, user_id, score_sum, quizzes)
+            SELECT 'global', user_id, SUM(score), COUNT(*) FROM scored GROUP BY user_id
+            UNION ALL
+            SELECT 'week:' || week, user_id, SUM(score), COUNT(*) FROM scored GROUP BY week, user_id
+            UNION ALL
+            SELECT 'topic:' || topic_id, user_id, SUM(score), COUNT(*) FROM scored
+            WHERE topic_id IS NOT NULL GROUP BY topic_id, user_id
+        ''')
+        return cursor.execute("SELECT COUNT(*) FROM leaderboard").fetchone()[0]
+    
+    def board(self, name):
+        return self.boards.get_or_load(name, lambda: self._load(name))
+    
+    def _load(self, name):
+        with self.db.connection() as conn:
+            rows = conn.execute("SELECT user_id, score_sum, quizzes FROM leaderboard WHERE board = ?",
+                                (name,)).fetchall()
+        return RankedBoard(rows)
+    
+    def apply(self, standings):
+        # Boards not loaded in this process are left alone; they are read fresh on first use
+        for name, user_id, score_sum, quizzes in standings:
+            board = self.boards.get(name)
+            if board is not None:
+                board.update(user_id, score_sum, quizzes)
+    
+    def get(self, name, user_id, limit=10, offset=0):
+        board = self.board(name)
+        top = board.top(limit, offset)
+        user_ids = [entry[1] for entry in top]
+        with self.db.connection() as conn:
+            usernames = dict(conn.execute("SELECT id, username FROM users WHERE id IN (%s)"
+                                          % ', '.join('?' * len(user_ids)), user_ids).fetchall())
+        mine = board.rank(user_id)
+        return {
+            'board': name,
+            'total': len(board),
+            'entries': [{
+                'rank': rank,
+                'user_id': entry_user_id,
+                'username': usernames.get(entry_user_id),
+                'average_score': round(average, 2),
+                'quizzes_taken': quizzes
+            } for rank, entry_user_id, average, quizzes in top],
+            'me': {
+                'rank': mine[0],
+                'average_score': round(mine[1], 2),
+                'quizzes_taken': mine[2]
+            } if mine else None
+        }
+
+@metrics.instrument
+class Review:
+    MAX_BATCH = 500
+    
+    def __init__(self, db):
+        self.db = db
+    
+    def get_due(self, user_id, limit=20, now=None):
+        now = scheduler.format_timestamp(now or datetime.datetime.utcnow())
+        with self.db.connection() as conn:
+            # Range scan on idx_progress_user_due; stops after `limit` rows
+            cards = conn.execute("""
+                SELECT p.vocab_id, p.due_at, p.interval_days, p.repetitions, p.status,
+                       v.word, v.meaning, v.example, v.pronunciation, v.topic_id
+                FROM progress p
+                JOIN vocabularies v ON v.id = p.vocab_id
+                WHERE p.user_id = ? AND p.due_at <= ?
+                ORDER BY p.due_at
+                LIMIT ?
+            """, (user_id, now, limit)).fetchall()
+        
+        return [{
+            'vocab_id': c[0],
+            'due_at': c[1],
+            'interval_days': c[2],
+            'repetitions': c[3],
+            'status': c[4],
+            'word': c[5],
+            'meaning': c[6],
+            'example': c[7],
+            'pronunciation': c[8],
+            'topic_id': c[9]
+        } for c in cards]
+    
+    def grade(self, user_id, grades, now=None):
+        # grades: {vocab_id: grade}. The whole session is applied in one transaction.
+        now = now or datetime.datetime.utcnow()
+        vocab_ids = list(grades)
+        placeholders = ', '.join('?' * len(vocab_ids))
+        
+        with self.db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            known = {row[0] for row in conn.execute(
+                "SELECT id FROM vocabularies WHERE id IN (%s)" % placeholders, vocab_ids)}
+            missing = [vocab_id for vocab_id in vocab_ids if vocab_id not in known]
+            if missing:
+                return {'success': False, 'message': 'Không tìm thấy từ vựng: %s' % ', '.join(map(str, missing))}
+            
+            current = {row[0]: row[1:] for row in conn.execute(
+                "SELECT vocab_id, ease_factor, interval_days, repetitions FROM progress "
+                "WHERE user_id = ? AND vocab_id IN (%s)" % placeholders, [user_id] + vocab_ids)}
+            
+            rows, schedule = [], []
+            for vocab_id in vocab_ids:
+                state = scheduler.review(grades[vocab_id], now, *current.get(vocab_id, ()))
+                rows.append((user_id, vocab_id, state.status, grades[vocab_id], scheduler.format_timestamp(now),
+                             state.ease_factor, state.interval_days, state.repetitions, state.due_at))
+                schedule.append({'vocab_id': vocab_id, 'due_at': state.due_at,
+                                 'interval_days': state.interval_days, 'status': state.status})
+            
+            conn.executemany("""
+                INSERT INTO progress (user_id, vocab_id, status, score, last_reviewed,
+                                      ease_factor, interval_days, repetitions, due_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, vocab_id) DO UPDATE SET
+                    status = excluded.status,
+                    score = excluded.score,
+                    last_reviewed = excluded.last_reviewed,
+                    ease_factor = excluded.ease_factor,
+                    interval_days = excluded.interval_days,
+                    repetitions = excluded.repetitions,
+                    due_at = excluded.due_at
+            """, rows)
+            UserStats.record_activity(conn, user_id, learned_words=len(vocab_ids) - len(current))
+        
+        return {'success': True, 'updated': len(rows), 'schedule': schedule}
+
+@metrics.instrument
+class ProgressEvents:
+    # Study-mode interactions (flashcards, matching, writing) are acknowledged straight away and
+    # coalesced per (user_id, vocab_id) in a WriteBehindBuffer; the flusher upserts them into
+    # progress in a few large transactions instead of one write per click.
+    MODES = ('flashcard', 'matching', 'writing')
+    MAX_BATCH = 500
+    FLUSH_CHUNK = 1000
+    
+    def __init__(self, db, interval=1.0, max_pending=10000):
+        self.db = db
+        self.buffer = WriteBehindBuffer(self._write, self._merge, interval=interval, max_pending=max_pending)
+    
+    @staticmethod
+    def _merge(old, new):
+        # (times seen, times correct, last seen)
+        return old[0] + new[0], old[1] + new[1], max(old[2], new[2])
+    
+    def record(self, user_id, events, now=None):
+        # events: [(vocab_id, correct)]. Raises BufferFull / BufferClosed.
+        seen_at = scheduler.format_timestamp(now or datetime.datetime.utcnow())
+        self.buffer.add(((user_id, vocab_id), (1, int(correct), seen_at)) for vocab_id, correct in events)
+    
+    def _write(self, batch):
+        # One transaction for the whole batch: WriteBehindBuffer retries the entire batch when this
+        # raises, so a partially committed batch would be counted twice. Chunks only bound the
+        # number of SQL variables per statement.
+        items = sorted(batch.items())
+        with self.db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            new_words = {}
+            for start in range(0, len(items), self.FLUSH_CHUNK):
+                chunk = items[start:start + self.FLUSH_CHUNK]
+                # Words seen for the first time count towards learned_words, as in Review.grade
+                existing = set(conn.execute(
+                    "SELECT user_id, vocab_id FROM progress WHERE (user_id, vocab_id) IN (VALUES %s)"
+                    % ', '.join(['(?, ?)'] * len(chunk)), [value for key, _ in chunk for value in key]).fetchall())
+                # New rows are due for their first scheduled review straight away
+                conn.executemany("""
+                    INSERT INTO progress (user_id, vocab_id, status, last_reviewed, due_at,
+                                          practice_count, practice_correct)
+                    VALUES (?, ?, 'learning', ?, ?, ?, ?)
+                    ON CONFLICT (user_id, vocab_id) DO UPDATE SET
+                        status = CASE WHEN status = 'not_learned' THEN 'learning' ELSE status END,
+                        last_reviewed = MAX(COALESCE(last_reviewed, ''), excluded.last_reviewed),
+                        practice_count = practice_count + excluded.practice_count,
+                        practice_correct = practice_correct + excluded.practice_correct
+                """, [(user_id, vocab_id, seen_at, seen_at, seen, correct)
+                      for (user_id, vocab_id), (seen, correct, seen_at) in chunk])
+                for key, _ in chunk:
+                    new_words[key[0]] = new_words.get(key[0], 0) + (key not in existing)
+            for user_id, learned_words in new_words.items():
+                UserStats.record_activity(conn, user_id, learned_words=learned_words)
 
 # Initialize database and models
 db = Database()
-user_model = User(db)
-topic_model = Topic(db)
-vocabulary_model = Vocabulary(db)
-quiz_model = Quiz(db)
+catalog_version = CatalogVersion(db, interval=float(os.environ.get('CATALOG_VERSION_INTERVAL', 1.0)))
+# Topics, vocabularies and quizzes are near-static. Writes in this process call catalog_cache.invalidate();
+# writes from other workers or the CLI bump catalog_version, which empties the cache within the interval.
+catalog_cache = LRUCache(max_entries=int(os.environ.get('CATALOG_CACHE_SIZE', 512)),
+                         ttl=int(os.environ.get('CATALOG_CACHE_TTL', 300)),
+                         shared_version=catalog_version.current)
+password_hasher = PasswordHasher(max_workers=int(os.environ.get('AUTH_HASH_THREADS', 2)))
+user_model = User(db, password_hasher)
+topic_model = Topic(db, catalog_cache)
+vocabulary_model = Vocabulary(db, catalog_cache)
+leaderboard_model = Leaderboard(db, ttl=int(os.environ.get('LEADERBOARD_TTL', 30)))
+quiz_model = Quiz(db, catalog_cache, leaderboard_model, catalog_version)
+user_stats_model = UserStats(db)
+
+def load_quiz_words():
+    # Pool order must not depend on the query plan, or the same seed yields a different quiz
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT v.id, v.word, v.meaning, v.topic_id, t.level
+            FROM vocabularies v
+            JOIN topics t ON t.id = v.topic_id
+            ORDER BY v.id
+        """).fetchall()
+
+random_quiz_generator = RandomQuizGenerator(load_quiz_words, version=catalog_version.current)
+review_model = Review(db)
+# Acknowledged events live only in memory until the next flush (at most PROGRESS_FLUSH_INTERVAL
+# seconds); the buffer is flushed on normal shutdown (atexit, gunicorn worker_exit, ASGI lifespan)
+progress_events_model = ProgressEvents(db, interval=float(os.environ.get('PROGRESS_FLUSH_INTERVAL', 1.0)),
+                                       max_pending=int(os.environ.get('PROGRESS_BUFFER_SIZE', 10000)))
+
+# Tokens that already passed signature verification, so hot authenticated routes skip jwt.decode.
+# Expiry is still checked on every hit.
+token_cache = LRUCache(max_entries=int(os.environ.get('TOKEN_CACHE_SIZE', 4096)), ttl=300)
+
+def verify_token(token):
+    data = token_cache.get(token)
+    if data is not None and data['exp'] > time.time():
+        return data
+    data = jwt.decode(token, current_app.secret_key, algorithms=['HS256'])
+    token_cache.set(token, data)
+    return data
 
 # Authentication decorator
 def token_required(f):
@@ -440,74 +1498,483 @@ def token_required(f):
         try:
             if token.startswith('Bearer '):
                 token = token[7:]
-            data = jwt.decode(token, app.secret_key, algorithms=['HS256'])
-            current_user = data
+            current_user = verify_token(token)
         except:
             return jsonify({'message': 'Token không hợp lệ'}), 401
         
         return f(current_user, *args, **kwargs)
     return decorated
 
+def admin_required(f):
+    @wraps(f)
+    @token_required
+    def decorated(current_user, *args, **kwargs):
+        if current_user.get('role') != 'admin':
+            return jsonify({'message': 'Không có quyền truy cập'}), 403
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+# Token buckets per (route, client) for the unauthenticated routes. Buckets are per process unless
+# RATE_LIMIT_BACKEND=sqlite; behind a reverse proxy set PROXY_COUNT so remote_addr is the real client.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+rate_limit_store = ratelimit.store_from_env()
+
+def rate_limit(per_minute, burst):
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if RATE_LIMIT_ENABLED:
+                key = '%s|%s' % (request.endpoint, request.remote_addr)
+                allowed, retry_after = rate_limit_store.take(key, per_minute / 60.0, burst)
+                if not allowed:
+                    response = jsonify({'message': 'Quá nhiều yêu cầu, vui lòng thử lại sau'})
+                    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                    return response, 429
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+# Pre-encoded catalog responses: JSON bytes, gzip variant and a strong ETag are built once per cache version
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 60))
+GZIP_MIN_SIZE = 512
+
+class EncodedPayload:
+    def __init__(self, data):
+        self.body = current_app.json.dumps(data, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.gzip_body = gzip.compress(self.body, 6) if len(self.body) >= GZIP_MIN_SIZE else None
+        self.gzip_etag = self.etag + '-gz'
+
+def catalog_response(key, loader):
+    payload = catalog_cache.get_or_load(('response',) + key, lambda: EncodedPayload(loader()))
+    use_gzip = payload.gzip_body is not None and request.accept_encodings['gzip'] > 0
+    etag = payload.gzip_etag if use_gzip else payload.etag
+    
+    if request.if_none_match.contains(payload.etag) or request.if_none_match.contains(payload.gzip_etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(payload.gzip_body if use_gzip else payload.body,
+                                      mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=%d' % CATALOG_MAX_AGE
+    response.vary.add('Accept-Encoding')
+    return response
+
+# All routes, request hooks and CLI commands live on one blueprint; create_app() below wires it into
+# a Flask app. The models above are process-wide and touch the database only on first use.
+api = Blueprint('api', __name__, cli_group=None)
+
+# Request metrics: latency, response size and SQL work per route, exposed on /metrics.
+# Counters are per process; with several gunicorn workers each one reports its own.
+profiler = metrics.SlowRequestProfiler.from_env()
+
+@api.before_app_request
+def start_request_metrics():
+    if not metrics.ENABLED:
+        return
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.start_trace(route)
+    g.profiler = profiler.start()
+
+@api.after_app_request
+def record_request_metrics(response):
+    trace = metrics.end_trace()
+    if trace is None:
+        return response
+    elapsed = time.perf_counter() - trace.started
+    labels = (('route', trace.route),)
+    metrics.registry.inc('http_requests_total', 'HTTP requests handled',
+                         labels + (('method', request.method), ('status', response.status_code)))
+    metrics.registry.observe('http_request_duration_seconds', 'Request latency', elapsed, labels)
+    metrics.registry.observe('http_request_sql_queries', 'SQL statements per request', trace.queries,
+                             labels, metrics.COUNT_BUCKETS)
+    metrics.registry.observe('http_request_sql_seconds', 'SQL time per request', trace.sql_seconds, labels)
+    if response.content_length is not None:
+        metrics.registry.observe('http_response_size_bytes', 'Response body size', response.content_length,
+                                 labels, metrics.SIZE_BUCKETS)
+    for sql, count in trace.repeated_statements():
+        metrics.registry.inc('http_n_plus_one_total', 'Statements repeated N_PLUS_ONE_THRESHOLD+ times in a request',
+                             labels)
+        current_app.logger.warning('possible N+1 in %s: %d x %s', trace.route, count, sql[:200])
+    profiler.finish(g.pop('profiler', None), trace.route, elapsed)
+    return response
+
+@api.teardown_app_request
+def finish_request_metrics(error=None):
+    # Requests that never reached after_request must still release the profiler and trace
+    metrics.end_trace()
+    if g.get('profiler') is not None:
+        profiler.finish(g.pop('profiler'), 'error', 0)
+
+# Prometheus scrapers authenticate with a static METRICS_TOKEN; without it /metrics is admin-only
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+def metrics_access_required(f):
+    admin_view = admin_required(f)
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        authorization = request.headers.get('Authorization', '')
+        if METRICS_TOKEN and hmac.compare_digest(authorization.encode(), ('Bearer ' + METRICS_TOKEN).encode()):
+            return f(None, *args, **kwargs)
+        return admin_view(*args, **kwargs)
+    return decorated
+
+@api.route('/metrics', methods=['GET'])
+@metrics_access_required
+def get_metrics(current_user):
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 # Routes
-@app.route('/api/register', methods=['POST'])
+@api.route('/api/register', methods=['POST'])
+@rate_limit(per_minute=5, burst=5)
 def register():
     data = request.get_json()
     result = user_model.register(data['username'], data['email'], data['password'])
     return jsonify(result)
 
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
+@rate_limit(per_minute=10, burst=10)
 def login():
     data = request.get_json()
     result = user_model.login(data['username'], data['password'])
     return jsonify(result)
 
-@app.route('/api/topics', methods=['GET'])
+@api.route('/api/topics', methods=['GET'])
+@rate_limit(per_minute=300, burst=100)
 def get_topics():
-    topics = topic_model.get_all()
-    return jsonify(topics)
+    return catalog_response(('topics',), topic_model.get_all)
+
+BUNDLE_MAX_LIMIT = 100
+BUNDLE_MAX_IDS = 100
+# Catalog pages are cached per (ids, fields, limit, offset); a bound keeps anonymous callers
+# from walking the response cache with arbitrary offsets
+BUNDLE_MAX_OFFSET = 10000
+
+def parse_bundle_fields(raw):
+    # "name,vocabularies.word,vocabularies.meaning,quizzes" -> {'name': None, 'vocabularies': {...}, 'quizzes': None}
+    if not raw:
+        return None
+    allowed = {'vocabularies': Topic.VOCABULARY_FIELDS, 'quizzes': Topic.QUIZ_FIELDS}
+    fields = {}
+    for item in raw.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        part, _, sub = item.partition('.')
+        if part not in Topic.TOPIC_FIELDS and part not in allowed:
+            raise ValueError(item)
+        if not sub:
+            fields[part] = None
+        elif part in allowed and sub in allowed[part]:
+            if part not in fields or fields[part] is not None:
+                fields.setdefault(part, set()).add(sub)
+        else:
+            raise ValueError(item)
+    # "fields=," and the like name nothing to select
+    if not fields:
+        raise ValueError(raw)
+    return fields
 
-@app.route('/api/topics/<int:topic_id>/vocabularies', methods=['GET'])
+@api.route('/api/topics/bundle', methods=['GET'])
+@rate_limit(per_minute=300, burst=100)
+def get_topic_bundle():
+    try:
+        ids = request.args.get('ids', '')
+        topic_ids = sorted({parse_int(i) for i in ids.split(',') if i.strip()})
+        if len(topic_ids) > BUNDLE_MAX_IDS:
+            raise ValueError(len(topic_ids))
+        fields = parse_bundle_fields(request.args.get('fields'))
+        limit = min(int(request.args.get('limit', 20)), BUNDLE_MAX_LIMIT)
+        offset = int(request.args.get('offset', 0))
+        if limit < 1 or not 0 <= offset <= BUNDLE_MAX_OFFSET:
+            raise ValueError(limit, offset)
+    except ValueError:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    
+    key_fields = None if fields is None else tuple(sorted(
+        (name, tuple(sorted(sub)) if sub else None) for name, sub in fields.items()))
+    return catalog_response(('bundle', tuple(topic_ids), key_fields, limit, offset),
+                            lambda: topic_model.get_bundle(topic_ids, fields, limit, offset))
+
+@api.route('/api/topics/<int:topic_id>/vocabularies', methods=['GET'])
+@rate_limit(per_minute=300, burst=100)
 def get_vocabularies(topic_id):
-    vocabularies = vocabulary_model.get_by_topic(topic_id)
-    return jsonify(vocabularies)
+    return catalog_response(('vocabularies', topic_id), lambda: vocabulary_model.get_by_topic(topic_id))
 
-@app.route('/api/topics/<int:topic_id>/quiz', methods=['GET'])
+@api.route('/api/vocabularies/search', methods=['GET'])
+@rate_limit(per_minute=300, burst=100)
+def search_vocabularies():
+    try:
+        query = request.args.get('q', '').strip()
+        prefix = request.args.get('prefix', '1') not in ('0', 'false')
+        topic_id = parse_int(request.args['topic_id']) if request.args.get('topic_id') else None
+        limit = min(int(request.args.get('limit', 20)), 100)
+        offset = int(request.args.get('offset', 0))
+        if not query or limit < 1 or not 0 <= offset <= Vocabulary.SEARCH_MAX_OFFSET:
+            raise ValueError(query)
+    except ValueError:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    
+    return jsonify(vocabulary_model.search(query, prefix, topic_id, limit, offset))
+
+@api.route('/api/topics/<int:topic_id>/quiz', methods=['GET'])
+@rate_limit(per_minute=300, burst=100)
 def get_quiz(topic_id):
-    quiz_questions = quiz_model.get_by_topic(topic_id)
-    return jsonify(quiz_questions)
+    return catalog_response(('quiz', topic_id), lambda: quiz_model.get_by_topic(topic_id))
+
+@api.route('/api/quiz/random', methods=['GET'])
+@rate_limit(per_minute=300, burst=100)
+def get_random_quiz():
+    try:
+        topic_id = int(request.args['topic_id']) if request.args.get('topic_id') else None
+        level = request.args.get('level') or None
+        count = int(request.args.get('count', 10))
+        seed = int(request.args['seed']) if request.args.get('seed') else None
+        if not 1 <= count <= 100:
+            raise ValueError(count)
+    except ValueError:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    
+    return jsonify(random_quiz_generator.generate(topic_id, level, count, seed))
 
-@app.route('/api/quiz/submit', methods=['POST'])
+@api.route('/api/quiz/submit', methods=['POST'])
 @token_required
 def submit_quiz(current_user):
-    data = request.get_json()
-    result = quiz_model.submit_result(current_user['user_id'], data['results'])
-    return jsonify(result)
+    data = request.get_json() or {}
+    # "answers" is the current format; "results" is what older clients send.
+    # Client-side is_correct flags are ignored: everything is graded against the server's answer key.
+    answers = []
+    try:
+        items = data.get('answers', data.get('results', []))
+        if not isinstance(items, list):
+            raise TypeError(items)
+        if len(items) > Quiz.MAX_ANSWERS:
+            return jsonify({'message': 'Tối đa %d câu trả lời mỗi lần nộp' % Quiz.MAX_ANSWERS}), 400
+        for item in items:
+            answer = item.get('answer', item.get('selected_answer'))
+            if not isinstance(answer, str):
+                raise TypeError(answer)
+            if item.get('quiz_id') is not None:
+                answers.append((int(item['quiz_id']), None, answer))
+            else:
+                answers.append((None, int(item['vocab_id']), answer))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({'message': 'Dữ liệu bài làm không hợp lệ'}), 400
+    if not answers:
+        return jsonify({'message': 'Bài làm không có câu trả lời'}), 400
+    
+    result = quiz_model.submit_result(current_user['user_id'], answers)
+    return jsonify(result), 200 if result['success'] else 400
 
-@app.route('/api/progress', methods=['GET'])
+@api.route('/api/progress', methods=['GET'])
 @token_required
 def get_progress(current_user):
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Get user's learning statistics
-    cursor.execute("""
-        SELECT 
-            COUNT(DISTINCT p.vocab_id) as learned_words,
-            AVG(r.score) as avg_score,
-            COUNT(DISTINCT r.id) as quizzes_taken
-        FROM progress p
-        LEFT JOIN results r ON r.user_id = p.user_id
-        WHERE p.user_id = ?
-    """, (current_user['user_id'],))
-    
-    stats = cursor.fetchone()
-    conn.close()
-    
-    return jsonify({
-        'learned_words': stats[0] or 0,
-        'average_score': round(stats[1] or 0, 2),
-        'quizzes_taken': stats[2] or 0
-    })
+    # Single primary-key lookup on the materialised stats
+    return jsonify(user_stats_model.get(current_user['user_id']))
+
+@api.route('/api/leaderboard', methods=['GET'])
+@token_required
+def get_leaderboard(current_user):
+    # ?scope=global|weekly|topic&topic_id=1&week=2024-07&limit=10&offset=0
+    scope = request.args.get('scope', 'global')
+    try:
+        limit = int(request.args.get('limit', 10))
+        offset = int(request.args.get('offset', 0))
+        if scope == 'global':
+            board = 'global'
+        elif scope == 'weekly':
+            week = request.args.get('week')
+            board = 'week:' + week if week else Leaderboard.week_board()
+            if not re.fullmatch(r'week:\d{4}-\d{2}', board):
+                raise ValueError(week)
+        elif scope == 'topic':
+            board = 'topic:%d' % int(request.args['topic_id'])
+        else:
+            raise ValueError(scope)
+    except (KeyError, ValueError):
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    if not 1 <= limit <= Leaderboard.MAX_LIMIT or offset < 0:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    return jsonify(leaderboard_model.get(board, current_user['user_id'], limit, offset))
+
+@api.route('/api/reviews/due', methods=['GET'])
+@token_required
+def get_due_reviews(current_user):
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    return jsonify({'cards': review_model.get_due(current_user['user_id'], limit)})
+
+@api.route('/api/reviews', methods=['POST'])
+@token_required
+def submit_reviews(current_user):
+    data = request.get_json() or {}
+    grades = {}
+    try:
+        for item in data.get('grades', []):
+            grade = int(item['grade'])
+            if not scheduler.MIN_GRADE <= grade <= scheduler.MAX_GRADE:
+                raise ValueError(grade)
+            grades[parse_int(item['vocab_id'])] = grade
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'message': 'Dữ liệu chấm điểm không hợp lệ'}), 400
+    if not grades or len(grades) > Review.MAX_BATCH:
+        return jsonify({'message': 'Cần từ 1 đến %d từ vựng' % Review.MAX_BATCH}), 400
+    
+    result = review_model.grade(current_user['user_id'], grades)
+    return jsonify(result), 200 if result['success'] else 400
+
+@api.route('/api/progress/events', methods=['POST'])
+@token_required
+def record_progress_events(current_user):
+    # {"events": [{"vocab_id": 1, "mode": "flashcard", "correct": true}]}
+    data = request.get_json(silent=True) or {}
+    events = data.get('events')
+    if not isinstance(events, list) or not 1 <= len(events) <= ProgressEvents.MAX_BATCH:
+        return jsonify({'message': 'Cần từ 1 đến %d sự kiện' % ProgressEvents.MAX_BATCH}), 400
+    try:
+        parsed = []
+        for event in events:
+            if event.get('mode') not in ProgressEvents.MODES:
+                raise ValueError(event)
+            parsed.append((parse_int(event['vocab_id']), bool(event.get('correct'))))
+        _, meanings = quiz_model.answer_key.keys()
+        if any(vocab_id not in meanings for vocab_id, _ in parsed):
+            _, meanings = quiz_model.answer_key.keys(fresh=True)
+            if any(vocab_id not in meanings for vocab_id, _ in parsed):
+                raise ValueError(parsed)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'message': 'Dữ liệu sự kiện không hợp lệ'}), 400
+    
+    try:
+        progress_events_model.record(current_user['user_id'], parsed)
+    except BufferFull:
+        response = jsonify({'message': 'Hệ thống đang bận, vui lòng thử lại sau'})
+        response.headers['Retry-After'] = str(max(1, int(progress_events_model.buffer.interval)))
+        return response, 429
+    except BufferClosed:
+        return jsonify({'message': 'Máy chủ đang tắt, vui lòng thử lại sau'}), 503
+    return jsonify({'accepted': len(parsed)}), 202
+
+@api.route('/api/admin/cache', methods=['GET'])
+@admin_required
+def get_cache_stats(current_user):
+    return jsonify(catalog_cache.stats())
+
+@api.route('/api/admin/cache', methods=['DELETE'])
+@admin_required
+def invalidate_cache(current_user):
+    catalog_cache.invalidate()
+    return jsonify(catalog_cache.stats())
+
+@api.route('/api/admin/analytics', methods=['GET'])
+@admin_required
+def get_analytics(current_user):
+    try:
+        topic_id = int(request.args['topic_id']) if request.args.get('topic_id') else None
+        min_attempts = int(request.args.get('min_attempts', 5))
+        limit = min(int(request.args.get('limit', 20)), 100)
+        if min_attempts < 1 or limit < 1:
+            raise ValueError(min_attempts, limit)
+    except ValueError:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    
+    with db.connection() as conn:
+        return jsonify(analytics.summary(conn, topic_id, min_attempts, limit))
+
+@api.route('/api/admin/import/<kind>', methods=['POST'])
+@admin_required
+def import_content(current_user, kind):
+    fmt = request.args.get('format', 'jsonl')
+    if kind not in content_io.KINDS or fmt not in content_io.FORMATS:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    # Read the request body as a stream so large uploads are never held in memory
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+    report = content_io.import_records(db, kind, content_io.read_records(stream, fmt))
+    catalog_cache.invalidate()
+    return jsonify(report)
+
+@api.route('/api/admin/export/<kind>', methods=['GET'])
+@admin_required
+def export_content(current_user, kind):
+    fmt = request.args.get('format', 'jsonl')
+    if kind not in content_io.KINDS or fmt not in content_io.FORMATS:
+        return jsonify({'message': 'Tham số không hợp lệ'}), 400
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(content_io.export_records(db, kind, fmt), mimetype=mimetype,
+                    headers={'Content-Disposition': 'attachment; filename=%s.%s' % (kind, fmt)})
+
+@api.cli.command('import-content')
+@click.argument('kind', type=click.Choice(sorted(content_io.KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(content_io.FORMATS), default=None)
+@click.option('--chunk-size', type=click.IntRange(1), default=5000)
+def import_content_command(kind, path, fmt, chunk_size):
+    """Import topics, vocabularies or quizzes from a CSV/JSONL file (rows with an id are upserted)."""
+    def progress(report):
+        click.echo('Đã xử lý %d dòng, nhập %d, lỗi %d' % (report['processed'], report['imported'], report['error_count']))
+
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        records = content_io.read_records(stream, fmt or content_io.format_for(path))
+        report = content_io.import_records(db, kind, records, chunk_size=chunk_size, on_progress=progress)
+    catalog_cache.invalidate()
+    for error in report['errors']:
+        click.echo('Dòng %d: %s' % (error['line'], error['message']), err=True)
+
+@api.cli.command('export-content')
+@click.argument('kind', type=click.Choice(sorted(content_io.KINDS)))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(content_io.FORMATS), default=None)
+def export_content_command(kind, path, fmt):
+    """Export topics, vocabularies or quizzes to a CSV/JSONL file."""
+    with open(path, 'w', encoding='utf-8', newline='') as out:
+        for chunk in content_io.export_records(db, kind, fmt or content_io.format_for(path)):
+            out.write(chunk)
+    click.echo('Đã xuất %s vào %s' % (kind, path))
+
+@api.cli.command('backfill-stats')
+def backfill_stats_command():
+    """Rebuild user_stats and leaderboards from results and progress."""
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        count = UserStats.backfill(conn.cursor())
+        entries = Leaderboard.backfill(conn.cursor())
+    leaderboard_model.boards.invalidate()
+    click.echo('Đã cập nhật thống kê cho %d người dùng' % count)
+    click.echo('Đã tính lại %d mục bảng xếp hạng' % entries)
+
+@api.cli.command('analytics')
+@click.option('--full', is_flag=True, help='Discard the stored statistics and watermark and start over.')
+@click.option('--chunk-size', type=click.IntRange(1), default=50000)
+def analytics_command(full, chunk_size):
+    """Fold new quiz attempts and current progress into the analytics tables (run it from cron)."""
+    def progress(report):
+        click.echo('Đã xử lý %d lượt trả lời, %d người dùng' % (report['attempts'], report['users']))
+
+    with file_lock(db.db_name + '.analytics.lock'):
+        report = analytics.run(db, chunk_size=chunk_size, full=full, on_progress=progress)
+    click.echo('Hoàn tất sau %.1fs, watermark %d' % (report['seconds'], report['watermark']))
+
+@api.cli.command('migrate')
+def migrate_command():
+    """Create tables and apply pending schema migrations (safe to run from several processes)."""
+    db.ensure_schema()
+    click.echo('Cơ sở dữ liệu ở phiên bản %d' % db.schema_version)
+
+def create_app():
+    app = Flask(__name__)
+    app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'your-super-secret-key-here')
+    CORS(app)
+    proxy_count = int(os.environ.get('PROXY_COUNT', 0))
+    if proxy_count:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count, x_proto=proxy_count)
+    app.register_blueprint(api)
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
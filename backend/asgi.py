@@ -0,0 +1,152 @@
+# ASGI entry point serving the same Flask app:
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port $PORT
+#
+# The event loop owns the sockets, so one process can hold hundreds of open
+# requests. Flask views (and all SQLite work) run on a bounded thread pool;
+# requests beyond ASGI_MAX_IN_FLIGHT are refused with 503 instead of queueing
+# without limit.
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import ClientDisconnected
+
+from app import app as wsgi_app, progress_events_model
+
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 16))
+ASGI_MAX_IN_FLIGHT = int(os.environ.get('ASGI_MAX_IN_FLIGHT', 512))
+
+
+class WSGIResponse:
+    def __init__(self):
+        self.status = 500
+        self.headers = []
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status = int(status.split(' ', 1)[0])
+        self.headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+
+class RequestBody(io.RawIOBase):
+    # wsgi.input fed from receive() as the app reads it (on a worker thread), so a large upload
+    # streams through instead of being collected in memory before the view starts
+    def __init__(self, receive, loop, first):
+        self._receive = receive
+        self._loop = loop
+        self._chunk = memoryview(first.get('body', b''))
+        self._more = first.get('more_body', False)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._more = False
+                raise ClientDisconnected()
+            self._chunk = memoryview(message.get('body', b''))
+            self._more = message.get('more_body', False)
+        count = min(len(buffer), len(self._chunk))
+        buffer[:count] = self._chunk[:count]
+        self._chunk = self._chunk[count:]
+        return count
+
+
+class AsgiApp:
+    def __init__(self, wsgi, threads=ASGI_THREADS, max_in_flight=ASGI_MAX_IN_FLIGHT):
+        self.wsgi = wsgi
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi-worker')
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                progress_events_model.buffer.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        if self.in_flight >= self.max_in_flight:
+            await send({'type': 'http.response.start', 'status': 503,
+                        'headers': [(b'content-type', b'application/json'), (b'retry-after', b'1')]})
+            await send({'type': 'http.response.body', 'body': b'{"message": "Server busy"}'})
+            return
+
+        self.in_flight += 1
+        try:
+            # Most bodies arrive in one message; anything after it is pulled by the view as it reads
+            first = await receive()
+            if first['type'] == 'http.disconnect':
+                return
+            loop = asyncio.get_running_loop()
+            response = WSGIResponse()
+            body = io.BufferedReader(RequestBody(receive, loop, first), buffer_size=64 * 1024)
+            environ = self.environ(scope, body)
+            chunks = await loop.run_in_executor(self.executor, self.wsgi, environ, response.start_response)
+            iterator = iter(chunks)
+            try:
+                # First chunk is produced together with the status line; streamed bodies keep
+                # pulling from the thread pool so generators never run on the event loop
+                chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                await send({'type': 'http.response.start', 'status': response.status,
+                            'headers': response.headers})
+                while chunk is not None:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                    chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(chunks, 'close'):
+                    await loop.run_in_executor(self.executor, chunks.close)
+        finally:
+            self.in_flight -= 1
+
+    def environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': 'HTTP/%s' % scope['http_version'],
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            # Bodies without Content-Length (chunked uploads) are read until the stream ends
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+            else:
+                key = 'HTTP_' + name
+                environ[key] = environ[key] + ',' + value if key in environ else value
+        return environ
+
+
+app = AsgiApp(wsgi_app)
@@ -0,0 +1,3 @@
+# Backend benchmarks. Run from the backend/ directory, e.g.:
+#   python -m benchmarks                      # full suite, JSON results in benchmarks/results/
+#   python -m benchmarks.bench_connections    # focused benchmarks
@@ -0,0 +1,4 @@
+# python -m benchmarks: seed, run every scenario and write JSON results (see suite.py)
+from .suite import main
+
+main()
@@ -0,0 +1,130 @@
+# Duplicate cold catalog requests: with single-flight loading the number of SQL statements per
+# burst stays flat however many identical requests arrive together. Also shows the login
+# rate limiter turning a burst into 429s, and the SQLite bucket store shared by two processes.
+#
+#   python -m benchmarks.bench_coalescing --duplicates 1,8,32,128 --load-ms 20
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from . import seed
+from .common import load_app
+
+_MISSING = object()
+ROUTES = ('/api/topics', '/api/topics/1/vocabularies', '/api/topics/1/quiz')
+
+
+def burst(client, path, duplicates):
+    # Release all requests at once so they miss the cache together
+    barrier = threading.Barrier(duplicates)
+    statuses = []
+
+    def request():
+        barrier.wait()
+        statuses.append(client.get(path).status_code)
+
+    workers = [threading.Thread(target=request) for _ in range(duplicates)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return statuses
+
+
+def uncoalesced(cache):
+    # The cache as it behaves without single flight: every concurrent miss runs its own load
+    def get_or_load(key, loader):
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            version = cache.version
+            value = loader()
+            cache.set(key, value, version)
+        return value
+    return get_or_load
+
+
+def slowed(get_or_load, delay):
+    # Stands in for a larger catalog: each load holds the database for `delay` seconds
+    def wrapper(key, loader):
+        def slow_loader():
+            time.sleep(delay)
+            return loader()
+        return get_or_load(key, slow_loader)
+    return wrapper
+
+
+def take_from_shared_store(path, attempts, queue):
+    import ratelimit
+    store = ratelimit.SQLiteStore(path)
+    queue.put(sum(store.take('login|10.0.0.1', 10 / 60.0, 10)[0] for _ in range(attempts)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duplicates', default='1,8,32,128')
+    parser.add_argument('--load-ms', type=float, default=20)
+    parser.add_argument('--logins', type=int, default=30)
+    args = parser.parse_args()
+
+    app_module = load_app()
+    if not app_module.metrics.ENABLED:
+        parser.error('needs METRICS_ENABLED=1 to count queries')
+    conn = app_module.db.get_connection()
+    seed.seed_catalog(conn, 50, 20, 5, __import__('random').Random(5))
+    conn.close()
+    client = app_module.app.test_client()
+    registry = app_module.metrics.registry
+    cache = app_module.catalog_cache
+    # The periodic catalog_version read would land in some bursts' counts
+    cache.shared_version = None
+    # Pool growth under the uncoalesced bursts trips the slow-query log; it is not what's measured
+    logging.getLogger('metrics').setLevel(logging.ERROR)
+    client.get('/api/topics')  # schema check and connection setup stay out of the counts
+
+    print('%-14s %-28s %10s %8s %10s %8s' % ('mode', 'route', 'duplicates', 'queries', 'coalesced', 'ms'))
+    for mode in ('single flight', 'uncoalesced'):
+        get_or_load = uncoalesced(cache) if mode == 'uncoalesced' else cache.get_or_load
+        cache.get_or_load = slowed(get_or_load, args.load_ms / 1000)
+        for path in ROUTES:
+            for duplicates in [int(n) for n in args.duplicates.split(',')]:
+                cache.invalidate()
+                coalesced = cache.coalesced
+                queries = registry.total('sqlite_query_duration_seconds')
+                start = time.perf_counter()
+                statuses = burst(client, path, duplicates)
+                elapsed = time.perf_counter() - start
+                assert statuses == [200] * duplicates, statuses
+                queries = registry.total('sqlite_query_duration_seconds') - queries
+                print('%-14s %-28s %10d %8d %10d %8.1f' % (
+                    mode, path, duplicates, queries, cache.coalesced - coalesced, elapsed * 1000))
+                if mode == 'single flight':
+                    # However many identical requests arrive together, the database sees one load
+                    assert queries == 1, (path, duplicates, queries)
+                    assert cache.coalesced - coalesced <= duplicates - 1
+    del cache.get_or_load
+
+    app_module.RATE_LIMIT_ENABLED = True
+    statuses = [client.post('/api/login', json={'username': 'nobody', 'password': 'x'}).status_code
+                for _ in range(args.logins)]
+    print('\n%d logins from one client: %d rejected with 429 (burst 10, 10/min)' % (
+        args.logins, statuses.count(429)))
+    assert statuses.count(429) == max(0, args.logins - 10), statuses
+
+    path = os.path.join(tempfile.mkdtemp(prefix='english_app_ratelimit_'), 'rate_limits.db')
+    queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=take_from_shared_store, args=(path, 20, queue)) for _ in range(2)]
+    for w in workers:
+        w.start()
+    allowed = sum(queue.get() for _ in workers)
+    for w in workers:
+        w.join()
+    print('2 processes x 20 attempts on a shared SQLite bucket: %d allowed' % allowed)
+    assert allowed == 10, allowed
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# Compares connect-per-call against the pooled connection layer on endpoints that
+# actually reach SQLite, driven through Flask's test client. Catalog reads are
+# measured with the catalog cache cleared before every call.
+#
+#   python -m benchmarks.bench_connections --requests 3000 --threads 4
+import argparse
+
+from .common import format_row, load_app, run_concurrently
+
+# (label, method, path, json body, clear the catalog cache first)
+ENDPOINTS = [
+    ('GET /api/progress', 'GET', '/api/progress', None, False),
+    ('GET /api/reviews/due', 'GET', '/api/reviews/due', None, False),
+    ('GET /api/vocabularies/search', 'GET', '/api/vocabularies/search?q=hotel', None, False),
+    ('POST /api/quiz/submit', 'POST', '/api/quiz/submit', {'answers': [{'quiz_id': 1, 'answer': 'A'}]}, False),
+    ('GET /api/topics/1/vocabularies nocache', 'GET', '/api/topics/1/vocabularies', None, True),
+]
+
+
+def use_database(app_module, database):
+    app_module.db = database
+    for model in (app_module.user_model, app_module.topic_model, app_module.vocabulary_model,
+                  app_module.leaderboard_model, app_module.quiz_model, app_module.quiz_model.answer_key,
+                  app_module.user_stats_model, app_module.review_model, app_module.progress_events_model,
+                  app_module.catalog_version):
+        model.db = database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    app_module = load_app()
+    client = app_module.app.test_client()
+    token = client.post('/api/login', json={'username': 'admin', 'password': 'admin123'}).get_json()['token']
+    headers = {'Authorization': 'Bearer ' + token}
+
+    modes = [
+        ('connect-per-call', app_module.Database(pooled=False)),
+        ('pooled', app_module.Database(pooled=True)),
+    ]
+    for mode, database in modes:
+        use_database(app_module, database)
+        print('== %s ==' % mode)
+        for label, method, path, body, uncached in ENDPOINTS:
+            def call(method=method, path=path, body=body, uncached=uncached):
+                if uncached:
+                    app_module.catalog_cache.invalidate()
+                response = client.open(path, method=method, json=body, headers=headers)
+                assert response.status_code == 200, (path, response.status_code)
+            call()  # warm up
+            elapsed, latencies = run_concurrently(call, args.requests, args.threads)
+            print(format_row(label, elapsed, latencies))
+        database.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Leaderboard queries over a large results table: per-request aggregation vs the precomputed
+# `leaderboard` table plus in-memory RankedBoard.
+#
+#   python -m benchmarks.bench_leaderboard --results 1000000 --users 100000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from . import seed
+from .common import load_app, percentile
+
+NAIVE_TOP = '''
+    SELECT user_id, AVG(score) AS average, COUNT(*) AS quizzes FROM results
+    GROUP BY user_id ORDER BY average DESC, quizzes DESC, user_id LIMIT 10
+'''
+NAIVE_RANK = '''
+    WITH totals AS (SELECT user_id, AVG(score) AS average, COUNT(*) AS quizzes FROM results GROUP BY user_id)
+    SELECT COUNT(*) + 1 FROM totals, (SELECT average, quizzes FROM totals WHERE user_id = ?) AS me
+    WHERE totals.average > me.average OR (totals.average = me.average AND totals.quizzes > me.quizzes)
+'''
+
+
+def timed(samples, run):
+    latencies = []
+    for _ in range(samples):
+        begin = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - begin)
+    return latencies
+
+
+def report(name, latencies):
+    print('%-34s p50 %9.3fms   p95 %9.3fms   p99 %9.3fms' % (
+        name, percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000,
+        percentile(latencies, 99) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--results', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--naive-samples', type=int, default=5)
+    args = parser.parse_args()
+
+    app_module = load_app()
+    database = app_module.Database(os.path.join(tempfile.mkdtemp(prefix='english_app_leaderboard_'), 'bench.db'))
+    rng = random.Random(11)
+    conn = database.get_connection()
+    start = time.perf_counter()
+    seed.seed_catalog(conn, 50, 20, 5, rng)
+    seed.seed_users(conn, args.users)
+    seed.seed_results(conn, args.results, rng)
+    print('seeded %d results for %d users in %.1fs' % (args.results, args.users, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    conn.execute("BEGIN IMMEDIATE")
+    entries = app_module.Leaderboard.backfill(conn.cursor())
+    conn.commit()
+    print('backfilled %d leaderboard entries in %.1fs' % (entries, time.perf_counter() - start))
+    user_ids = [row[0] for row in conn.execute("SELECT DISTINCT user_id FROM results")]
+
+    report('naive top-10 (GROUP BY)', timed(args.naive_samples, lambda: conn.execute(NAIVE_TOP).fetchall()))
+    report('naive my rank (GROUP BY)', timed(
+        args.naive_samples, lambda: conn.execute(NAIVE_RANK, (rng.choice(user_ids),)).fetchone()))
+
+    leaderboard = app_module.Leaderboard(database)
+    start = time.perf_counter()
+    leaderboard.board('global')
+    print('cold load of the global board: %.0fms' % ((time.perf_counter() - start) * 1000))
+    board = leaderboard.board('global')
+    report('precomputed top-10', timed(args.samples, lambda: board.top(10)))
+    report('precomputed my rank', timed(args.samples, lambda: board.rank(rng.choice(user_ids))))
+    report('GET-equivalent (top-10 + me)', timed(
+        args.samples, lambda: leaderboard.get('global', rng.choice(user_ids))))
+
+    def submit():
+        # Same statements Quiz.submit_result runs for the leaderboard, then the in-memory update
+        with database.connection() as write:
+            standings = app_module.Leaderboard.record(write, rng.choice(user_ids), rng.randrange(0, 101, 10),
+                                                      quiz_ids=[1])
+        leaderboard.apply(standings)
+    report('record + apply a new result', timed(args.samples, submit))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Login throughput under concurrent load (scrypt on the bounded hashing pool),
+# including the one-off legacy SHA-256 -> scrypt upgrade, and the effect of the
+# verified-token cache on an authenticated route.
+#
+#   python -m benchmarks.bench_login --users 200 --threads 8
+import argparse
+import itertools
+import threading
+
+from . import seed
+from .common import format_row, load_app, run_concurrently
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    app_module = load_app()
+    conn = app_module.db.get_connection()
+    seed.seed_users(conn, args.users)
+    usernames = [row[0] for row in conn.execute("SELECT username FROM users WHERE role = 'user'")]
+    conn.close()
+    client = app_module.app.test_client()
+    print('hash pool: %d threads' % app_module.password_hasher.executor._max_workers)
+
+    for label in ('legacy hash + rehash', 'scrypt'):
+        names = iter(usernames)
+        lock = threading.Lock()
+
+        def login():
+            with lock:
+                username = next(names)
+            response = client.post('/api/login', json={'username': username, 'password': seed.SEED_PASSWORD})
+            assert response.get_json()['success'], username
+
+        elapsed, latencies = run_concurrently(login, len(usernames), args.threads)
+        print(format_row('/api/login (%s)' % label, elapsed, latencies))
+
+    tokens = itertools.cycle([
+        client.post('/api/login', json={'username': username, 'password': seed.SEED_PASSWORD}).get_json()['token']
+        for username in usernames[:50]
+    ])
+    token_lock = threading.Lock()
+
+    def progress():
+        with token_lock:
+            token = next(tokens)
+        response = client.get('/api/progress', headers={'Authorization': 'Bearer ' + token})
+        assert response.status_code == 200
+
+    for label, cache in (('token cache off', app_module.LRUCache(max_entries=0)),
+                         ('token cache on', app_module.LRUCache(max_entries=4096, ttl=300))):
+        app_module.token_cache = cache
+        elapsed, latencies = run_concurrently(progress, args.requests, args.threads)
+        print(format_row('/api/progress (%s)' % label, elapsed, latencies))
+
+        token = next(tokens)
+        with app_module.app.app_context():
+            elapsed, latencies = run_concurrently(lambda: app_module.verify_token(token), args.requests * 10, 1)
+        print(format_row('verify_token (%s)' % label, elapsed, latencies))
+
+
+if __name__ == '__main__':
+    main()
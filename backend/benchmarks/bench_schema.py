@@ -0,0 +1,86 @@
+# Query plans and timings for the hot lookups before and after the schema
+# migrations (indexes + unique progress rows), at production-like scale.
+#
+#   python -m benchmarks.bench_schema --users 100000 --results 1000000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from . import seed
+from .common import load_app, percentile
+
+QUERIES = [
+    ('vocabularies by topic', "SELECT * FROM vocabularies WHERE topic_id = ?", 'topic'),
+    ('quiz by topic', "SELECT * FROM quizzes WHERE topic_id = ?", 'topic'),
+    ('progress stats', """
+        SELECT COUNT(DISTINCT p.vocab_id), AVG(r.score), COUNT(DISTINCT r.id)
+        FROM progress p LEFT JOIN results r ON r.user_id = p.user_id
+        WHERE p.user_id = ?
+    """, 'user'),
+    ('recent results', "SELECT score, completed_at FROM results WHERE user_id = ? ORDER BY completed_at DESC LIMIT 10",
+     'user'),
+]
+
+
+def measure(conn, label, samples, max_topic, max_user, rng):
+    print('== %s ==' % label)
+    for name, sql, param in QUERIES:
+        plan = conn.execute('EXPLAIN QUERY PLAN ' + sql, (1,)).fetchall()
+        latencies = []
+        for _ in range(samples):
+            value = rng.randint(1, max_topic if param == 'topic' else max_user)
+            start = time.perf_counter()
+            conn.execute(sql, (value,)).fetchall()
+            latencies.append(time.perf_counter() - start)
+        print('%-22s p50 %8.3fms   p99 %8.3fms' % (
+            name, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000))
+        for row in plan:
+            print('    ' + row[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--results', type=int, default=1000000)
+    parser.add_argument('--progress', type=int, default=1000000)
+    parser.add_argument('--topics', type=int, default=500)
+    parser.add_argument('--vocabularies-per-topic', type=int, default=100)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    app_module = load_app()
+
+    class UnmigratedDatabase(app_module.Database):
+        MIGRATIONS = []
+
+    path = os.path.join(tempfile.mkdtemp(prefix='english_app_schema_'), 'bench.db')
+    database = UnmigratedDatabase(path)
+    start = time.perf_counter()
+    seed.seed(database, users=args.users, topics=args.topics,
+              vocabularies_per_topic=args.vocabularies_per_topic, quizzes_per_topic=5,
+              results=args.results, progress=args.progress)
+    print('seeded in %.1fs' % (time.perf_counter() - start))
+
+    conn = database.get_connection()
+    conn.execute("ANALYZE")
+    max_topic = conn.execute("SELECT MAX(id) FROM topics").fetchone()[0]
+    max_user = conn.execute("SELECT MAX(id) FROM users").fetchone()[0]
+    measure(conn, 'before migrations', args.samples, max_topic, max_user, random.Random(1))
+
+    start = time.perf_counter()
+    database.MIGRATIONS = app_module.Database.MIGRATIONS
+    with database.connection() as migrate_conn:
+        database.migrate(migrate_conn.cursor())
+    print('migrated in %.1fs' % (time.perf_counter() - start))
+
+    conn.close()
+    conn = database.get_connection()
+    conn.execute("ANALYZE")
+    measure(conn, 'after migrations', args.samples, max_topic, max_user, random.Random(1))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# Latency of /api/vocabularies/search queries against a large synthetic corpus.
+#
+#   python -m benchmarks.bench_search --vocabularies 500000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from . import seed
+from .common import load_app, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--vocabularies', type=int, default=500000)
+    parser.add_argument('--samples', type=int, default=500)
+    args = parser.parse_args()
+
+    app_module = load_app()
+    database = app_module.Database(os.path.join(tempfile.mkdtemp(prefix='english_app_search_'), 'bench.db'))
+    rng = random.Random(7)
+    conn = database.get_connection()
+    start = time.perf_counter()
+    seed.seed_catalog(conn, args.vocabularies // 100, 100, 0, rng)
+    conn.execute("INSERT INTO vocabularies_fts (vocabularies_fts) VALUES ('optimize')")
+    conn.commit()
+    words = [row[0] for row in conn.execute("SELECT word FROM vocabularies ORDER BY random() LIMIT 1000")]
+    meanings = [row[0] for row in conn.execute("SELECT meaning FROM vocabularies ORDER BY random() LIMIT 1000")]
+    conn.close()
+    print('seeded %d words in %.1fs' % (args.vocabularies, time.perf_counter() - start))
+
+    vocabulary = app_module.Vocabulary(database)
+    scenarios = [
+        ('exact word', lambda: vocabulary.search(rng.choice(words), prefix=False)),
+        ('word prefix (4 chars)', lambda: vocabulary.search(rng.choice(words)[:4])),
+        ('meaning, no diacritics', lambda: vocabulary.search(app_module.fold_text(rng.choice(meanings)))),
+        ('single common term', lambda: vocabulary.search(rng.choice(('nha', 'hoc', 'dau')), prefix=False)),
+        ('page 5 of a prefix', lambda: vocabulary.search(rng.choice(words)[:3], offset=80)),
+    ]
+    for name, run in scenarios:
+        latencies = []
+        for _ in range(args.samples):
+            begin = time.perf_counter()
+            run()
+            latencies.append(time.perf_counter() - begin)
+        print('%-24s p50 %7.2fms   p95 %7.2fms   p99 %7.2fms' % (
+            name, percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000,
+            percentile(latencies, 99) * 1000))
+
+
+if __name__ == '__main__':
+    main()
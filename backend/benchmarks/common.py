@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(workdir=None):
+    # app.py creates english_app.db in the current directory on import,
+    # so benchmarks import it from a scratch directory
+    workdir = workdir or tempfile.mkdtemp(prefix='english_app_bench_')
+    os.chdir(workdir)
+    # Every benchmark request comes from one client; don't let the per-client limits throttle it.
+    # Set in os.environ so server processes started by loadtest inherit it too.
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import app
+    return app
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_concurrently(fn, total, threads):
+    # Calls fn() `total` times spread over `threads` threads.
+    # Returns (elapsed_seconds, per_call_latencies)
+    latencies = []
+    lock = threading.Lock()
+    per_thread = [total // threads + (1 if i < total % threads else 0) for i in range(threads)]
+
+    def worker(count):
+        local = []
+        for _ in range(count):
+            start = time.perf_counter()
+            fn()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(count,)) for count in per_thread]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start, latencies
+
+
+def format_row(name, elapsed, latencies):
+    count = len(latencies)
+    return '%-38s %9.0f req/s   p50 %6.2fms   p99 %6.2fms' % (
+        name,
+        count / elapsed if elapsed else 0,
+        percentile(latencies, 50) * 1000,
+        percentile(latencies, 99) * 1000,
+    )
@@ -0,0 +1,123 @@
+# HTTP load test comparing the sync (gunicorn) and async (uvicorn + asgi.py)
+# serving modes. Each mode is started as a subprocess on a scratch database and
+# driven by an in-process asyncio client holding `--concurrency` requests open.
+#
+#   python -m benchmarks.loadtest --concurrency 200 --requests 4000
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from .common import BACKEND_DIR, percentile
+
+DEFAULT_PATHS = ['/api/topics', '/api/topics/1/vocabularies', '/api/topics/1/quiz', '/api/quiz/random?count=10']
+
+MODES = {
+    'sync': lambda port, workers: ['gunicorn', 'app:app', '--bind', '127.0.0.1:%d' % port,
+                                   '--workers', str(workers),
+                                   '--config', os.path.join(BACKEND_DIR, 'gunicorn.conf.py')],
+    'async': lambda port, workers: ['uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                                    '--workers', str(workers), '--no-access-log'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, workers, extra_env=None, workdir=None):
+    # workdir holds english_app.db; pass a seeded one to load-test realistic data
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, **(extra_env or {}))
+    process = subprocess.Popen(MODES[mode](port, workers), cwd=workdir or tempfile.mkdtemp(prefix='english_app_load_'),
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('%s server did not start' % mode)
+
+
+async def fetch(port, path, headers=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = ['GET %s HTTP/1.1' % path, 'Host: 127.0.0.1', 'Connection: close']
+    lines.extend('%s: %s' % item for item in (headers or {}).items())
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    status = int(data.split(b' ', 2)[1]) if data else 0
+    return status, len(data)
+
+
+async def drive(port, paths, total, concurrency, headers=None):
+    latencies, errors, sizes = [], 0, 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors, sizes
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                status, size = await fetch(port, paths[index % len(paths)], headers)
+            except OSError:
+                status, size = 0, 0
+            latencies.append(time.perf_counter() - start)
+            sizes += size
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': total,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'bytes': sizes,
+    }
+
+
+def run_mode(mode, paths, total, concurrency, workers, workdir=None, headers=None):
+    process, port = start_server(mode, workers, workdir=workdir)
+    try:
+        asyncio.run(drive(port, paths, min(total, 200), concurrency, headers))  # warm up
+        return asyncio.run(drive(port, paths, total, concurrency, headers))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--paths', default=','.join(DEFAULT_PATHS))
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    paths = args.paths.split(',')
+    for mode in args.modes.split(','):
+        result = run_mode(mode, paths, args.requests, args.concurrency, args.workers)
+        print('%-6s %8.1f req/s   p50 %7.2fms   p95 %7.2fms   p99 %7.2fms   errors %d' % (
+            mode, result['throughput_rps'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            result['errors']))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# Synthetic data for benchmarks, written into a database created by app.Database
+# so the real schema (and its migrations) are exercised.
+import datetime
+import hashlib
+import itertools
+import random
+
+CHUNK_SIZE = 50000
+LEVELS = ('A1', 'A2', 'B1', 'B2', 'C1')
+# Syllables for pseudo-words so text search sees a realistic spread of terms
+EN_SYLLABLES = ('ba', 'con', 'ter', 'mo', 'lin', 'pre', 'sta', 'ri', 'ven', 'dus', 'cal', 'op', 'ment', 'ga',
+                'tion', 'ple', 'kor', 'wi', 'sen', 'the', 'ab', 'ly', 'fo', 'nu', 'ex', 'ro', 'sh', 'el')
+VI_SYLLABLES = ('nhà', 'bố', 'mẹ', 'học', 'sinh', 'đường', 'nước', 'cây', 'trường', 'bàn', 'ghế', 'đau',
+                'đầu', 'khỏe', 'mạnh', 'biển', 'núi', 'sông', 'xe', 'đạp', 'chợ', 'áo', 'quần', 'cơm')
+SEED_PASSWORD = 'password123'
+
+
+def _chunked(rows, size=CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(conn, sql, rows):
+    for chunk in _chunked(rows):
+        conn.executemany(sql, chunk)
+    conn.commit()
+
+
+def _pseudo_word(rng, syllables, low, high, sep=''):
+    return sep.join(rng.choice(syllables) for _ in range(rng.randint(low, high)))
+
+
+def _timestamp(rng, days):
+    moment = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=rng.randrange(days * 86400))
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def seed_catalog(conn, topics, vocabularies_per_topic, quizzes_per_topic, rng):
+    start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM topics").fetchone()[0]
+    _insert(conn, "INSERT INTO topics (id, name, level, description) VALUES (?, ?, ?, ?)",
+            ((start + i, 'Topic %d' % i, rng.choice(LEVELS), 'Synthetic topic %d' % i)
+             for i in range(1, topics + 1)))
+    topic_ids = range(start + 1, start + topics + 1)
+    _insert(conn, "INSERT INTO vocabularies (word, meaning, example, pronunciation, topic_id) VALUES (?, ?, ?, ?, ?)",
+            ((_pseudo_word(rng, EN_SYLLABLES, 2, 4), _pseudo_word(rng, VI_SYLLABLES, 1, 3, ' '),
+              'The %s is here.' % _pseudo_word(rng, EN_SYLLABLES, 2, 3), '/w/', t)
+             for t in topic_ids for i in range(vocabularies_per_topic)))
+    _insert(conn, "INSERT INTO quizzes (topic_id, question, option_a, option_b, option_c, option_d, correct_answer) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((t, 'Question %d?' % i, 'a', 'b', 'c', 'd', rng.choice('ABCD'))
+             for t in topic_ids for i in range(quizzes_per_topic)))
+
+
+def seed_users(conn, count):
+    password = hashlib.sha256(SEED_PASSWORD.encode()).hexdigest()
+    start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+    _insert(conn, "INSERT INTO users (id, username, email, password) VALUES (?, ?, ?, ?)",
+            ((start + i, 'user%d' % (start + i), 'user%d@example.com' % (start + i), password)
+             for i in range(1, count + 1)))
+
+
+def seed_results(conn, count, rng, days=90):
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+    quiz_ids = [row[0] for row in conn.execute("SELECT id FROM quizzes")]
+    _insert(conn, "INSERT INTO results (user_id, quiz_id, score, total_questions, completed_at) VALUES (?, ?, ?, ?, ?)",
+            ((rng.choice(user_ids), rng.choice(quiz_ids), rng.randrange(0, 101, 10), 10, _timestamp(rng, days))
+             for _ in range(count)))
+
+
+def seed_attempts(conn, count, rng, accuracy=0.7):
+    # Per-question answers spread over existing results; half quiz questions, half generated word questions
+    result_ids = conn.execute("SELECT id, user_id FROM results").fetchall()
+    quiz_ids = [row[0] for row in conn.execute("SELECT id FROM quizzes")]
+    vocab_ids = [row[0] for row in conn.execute("SELECT id FROM vocabularies")]
+    # Some words and questions are harder than others, so the analytics have something to rank
+    difficulty = {key: rng.random() * 0.5 for key in itertools.chain(
+        (('quiz', i) for i in quiz_ids), (('vocab', i) for i in vocab_ids))}
+
+    def rows():
+        for _ in range(count):
+            result_id, user_id = rng.choice(result_ids)
+            if rng.random() < 0.5:
+                quiz_id, vocab_id, key = rng.choice(quiz_ids), None, 'quiz'
+            else:
+                quiz_id, vocab_id, key = None, rng.choice(vocab_ids), 'vocab'
+            correct = rng.random() < accuracy - difficulty[key, quiz_id or vocab_id] + 0.25
+            yield result_id, user_id, quiz_id, vocab_id, 'A', int(correct)
+
+    _insert(conn, "INSERT INTO quiz_attempts (result_id, user_id, quiz_id, vocab_id, answer, is_correct) "
+                  "VALUES (?, ?, ?, ?, ?, ?)", rows())
+
+
+def seed_progress(conn, count, rng, days=90):
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+    vocab_ids = [row[0] for row in conn.execute("SELECT id FROM vocabularies")]
+    per_user = max(1, min(len(vocab_ids), count // max(1, len(user_ids))))
+
+    def rows():
+        produced = 0
+        for user_id in user_ids:
+            for vocab_id in rng.sample(vocab_ids, per_user):
+                if produced == count:
+                    return
+                produced += 1
+                yield (user_id, vocab_id, rng.choice(('learning', 'learned')), rng.randrange(0, 6),
+                       _timestamp(rng, days))
+
+    _insert(conn, "INSERT INTO progress (user_id, vocab_id, status, score, last_reviewed) VALUES (?, ?, ?, ?, ?)",
+            rows())
+
+
+def seed(database, users=1000, topics=50, vocabularies_per_topic=20, quizzes_per_topic=5,
+         results=10000, progress=10000, attempts=0, seed=42):
+    rng = random.Random(seed)
+    conn = database.get_connection()
+    try:
+        seed_catalog(conn, topics, vocabularies_per_topic, quizzes_per_topic, rng)
+        seed_users(conn, users)
+        seed_results(conn, results, rng)
+        if attempts:
+            seed_attempts(conn, attempts, rng)
+        seed_progress(conn, progress, rng)
+    finally:
+        conn.close()
@@ -0,0 +1,392 @@
+# Whole-backend benchmark: seeds a scratch database at the requested scale, drives every
+# /api route through the Flask test client (and the GET routes over HTTP with loadtest),
+# prints throughput, latency percentiles and memory per scenario and writes them as JSON.
+#
+#   python -m benchmarks --users 5000 --results 200000 --requests 500
+#   python -m benchmarks --baseline benchmarks/results/<earlier run>.json
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from . import loadtest, seed
+from .common import BACKEND_DIR, load_app, percentile, run_concurrently
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+LOGIN_REQUESTS = 30
+TOKEN_USERS = 20
+BOOT_RUNS = 5
+# Run in a fresh interpreter: time to import the app, then to answer its first request
+BOOT_SCRIPT = '''
+import time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+status = app.app.test_client().get('/api/topics').status_code
+print(imported - start, time.perf_counter() - imported, status)
+'''
+
+
+class Scenario:
+    def __init__(self, name, method, route, build, auth=None, requests=None):
+        # build(rng) -> (path, json body or raw bytes or None)
+        self.name = name
+        self.method = method
+        self.route = route
+        self.build = build
+        self.auth = auth
+        self.requests = requests
+
+
+class Context:
+    # Ids and tokens sampled from the seeded database once, shared by every scenario
+    def __init__(self, app_module, client):
+        with app_module.db.connection() as conn:
+            self.topic_ids = [row[0] for row in conn.execute("SELECT id FROM topics")]
+            self.vocab_ids = [row[0] for row in conn.execute("SELECT id FROM vocabularies")]
+            self.words = [row[0] for row in conn.execute("SELECT word FROM vocabularies ORDER BY random() LIMIT 1000")]
+            quizzes = conn.execute("SELECT id, topic_id, correct_answer FROM quizzes").fetchall()
+            usernames = [row[0] for row in conn.execute(
+                "SELECT username FROM users WHERE role = 'user' ORDER BY id LIMIT ?", (TOKEN_USERS,))]
+        self.quizzes_by_topic = {}
+        for quiz_id, topic_id, answer in quizzes:
+            self.quizzes_by_topic.setdefault(topic_id, []).append((quiz_id, answer))
+        self.quiz_topic_ids = list(self.quizzes_by_topic)
+        self.login_username = usernames[0]
+        self.user_tokens = itertools.cycle([self._login(client, username, seed.SEED_PASSWORD)
+                                            for username in usernames])
+        self.admin_token = self._login(client, 'admin', 'admin123')
+        self.registered = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _login(client, username, password):
+        return client.post('/api/login', json={'username': username, 'password': password}).get_json()['token']
+
+    def headers(self, auth):
+        if auth == 'admin':
+            return {'Authorization': 'Bearer ' + self.admin_token}
+        if auth == 'user':
+            with self._lock:
+                return {'Authorization': 'Bearer ' + next(self.user_tokens)}
+        return {}
+
+    def quiz_answers(self, rng):
+        quizzes = self.quizzes_by_topic[rng.choice(self.quiz_topic_ids)]
+        return [{'quiz_id': quiz_id, 'answer': answer if rng.random() < 0.7 else 'A'} for quiz_id, answer in quizzes]
+
+
+def scenarios(ctx):
+    return [
+        Scenario('topics', 'GET', '/api/topics', lambda rng: ('/api/topics', None)),
+        Scenario('topics bundle', 'GET', '/api/topics/bundle',
+                 lambda rng: ('/api/topics/bundle?limit=20&offset=%d' % rng.randrange(0, len(ctx.topic_ids), 20), None)),
+        Scenario('topic vocabularies', 'GET', '/api/topics/<int:topic_id>/vocabularies',
+                 lambda rng: ('/api/topics/%d/vocabularies' % rng.choice(ctx.topic_ids), None)),
+        Scenario('topic quiz', 'GET', '/api/topics/<int:topic_id>/quiz',
+                 lambda rng: ('/api/topics/%d/quiz' % rng.choice(ctx.topic_ids), None)),
+        Scenario('vocabulary search', 'GET', '/api/vocabularies/search',
+                 lambda rng: ('/api/vocabularies/search?q=%s' % rng.choice(ctx.words)[:4], None)),
+        Scenario('random quiz', 'GET', '/api/quiz/random', lambda rng: ('/api/quiz/random?count=10', None)),
+        Scenario('progress', 'GET', '/api/progress', lambda rng: ('/api/progress', None), auth='user'),
+        Scenario('leaderboard (global)', 'GET', '/api/leaderboard',
+                 lambda rng: ('/api/leaderboard', None), auth='user'),
+        Scenario('leaderboard (topic)', 'GET', '/api/leaderboard',
+                 lambda rng: ('/api/leaderboard?scope=topic&topic_id=%d' % rng.choice(ctx.quiz_topic_ids), None),
+                 auth='user'),
+        Scenario('reviews due', 'GET', '/api/reviews/due', lambda rng: ('/api/reviews/due', None), auth='user'),
+        Scenario('metrics', 'GET', '/metrics', lambda rng: ('/metrics', None), auth='admin'),
+        Scenario('admin cache stats', 'GET', '/api/admin/cache', lambda rng: ('/api/admin/cache', None), auth='admin'),
+        Scenario('admin analytics', 'GET', '/api/admin/analytics',
+                 lambda rng: ('/api/admin/analytics?topic_id=%d' % rng.choice(ctx.topic_ids), None), auth='admin'),
+        Scenario('admin export topics', 'GET', '/api/admin/export/<kind>',
+                 lambda rng: ('/api/admin/export/topics', None), auth='admin'),
+        Scenario('register', 'POST', '/api/register',
+                 lambda rng: ('/api/register', _registration(next(ctx.registered)))),
+        Scenario('login', 'POST', '/api/login',
+                 lambda rng: ('/api/login', {'username': ctx.login_username, 'password': seed.SEED_PASSWORD}),
+                 requests=LOGIN_REQUESTS),
+        Scenario('quiz submit', 'POST', '/api/quiz/submit',
+                 lambda rng: ('/api/quiz/submit', {'answers': ctx.quiz_answers(rng)}), auth='user'),
+        Scenario('review grades', 'POST', '/api/reviews',
+                 lambda rng: ('/api/reviews', {'grades': [{'vocab_id': vocab_id, 'grade': rng.randrange(6)}
+                                                          for vocab_id in rng.sample(ctx.vocab_ids, 10)]}),
+                 auth='user'),
+        Scenario('progress events', 'POST', '/api/progress/events',
+                 lambda rng: ('/api/progress/events', {'events': [
+                     {'vocab_id': vocab_id, 'mode': rng.choice(('flashcard', 'matching', 'writing')),
+                      'correct': rng.random() < 0.7} for vocab_id in rng.sample(ctx.vocab_ids, 10)]}),
+                 auth='user'),
+        # Writes to the catalog invalidate the caches, so these run last
+        Scenario('admin import vocabularies', 'POST', '/api/admin/import/<kind>',
+                 lambda rng: ('/api/admin/import/vocabularies?format=jsonl', _vocabulary_upserts(ctx, rng)),
+                 auth='admin'),
+        Scenario('admin cache clear', 'DELETE', '/api/admin/cache',
+                 lambda rng: ('/api/admin/cache', None), auth='admin'),
+    ]
+
+
+def _registration(index):
+    name = 'bench_%d_%d' % (os.getpid(), index)
+    return {'username': name, 'email': name + '@example.com', 'password': seed.SEED_PASSWORD}
+
+
+def _vocabulary_upserts(ctx, rng, rows=20):
+    lines = [json.dumps({'id': vocab_id, 'word': 'word%d' % vocab_id, 'meaning': 'nghĩa %d' % vocab_id,
+                         'topic_id': rng.choice(ctx.topic_ids)})
+             for vocab_id in rng.sample(ctx.vocab_ids, rows)]
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def request_once(client, ctx, scenario, rng):
+    path, body = scenario.build(rng)
+    kwargs = {'method': scenario.method, 'headers': ctx.headers(scenario.auth)}
+    if isinstance(body, bytes):
+        kwargs['data'] = body
+    elif body is not None:
+        kwargs['json'] = body
+    response = client.open(path, **kwargs)
+    response.get_data()
+    response.close()
+    return response.status_code
+
+
+def run_scenario(client, ctx, scenario, total, threads, memory_requests, seed_value):
+    rng = random.Random(seed_value)
+    lock = threading.Lock()
+    errors = []
+
+    def call():
+        with lock:
+            local_rng = random.Random(rng.random())
+        status = request_once(client, ctx, scenario, local_rng)
+        if status >= 400:
+            errors.append(status)
+
+    total = scenario.requests or total
+    for _ in range(min(5, total)):
+        call()  # warm caches and statement cache
+    errors.clear()
+    elapsed, latencies = run_concurrently(call, total, threads)
+
+    # Memory is measured on a separate short pass so tracemalloc does not skew the timings
+    tracemalloc.start()
+    for _ in range(min(memory_requests, total)):
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'name': scenario.name,
+        'method': scenario.method,
+        'route': scenario.route,
+        'requests': total,
+        'errors': len(errors),
+        'threads': threads,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'peak_alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def uncovered_routes(app, suite):
+    covered = {(scenario.route, scenario.method) for scenario in suite}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if not (rule.rule.startswith('/api/') or rule.rule == '/metrics'):
+            continue
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            if (rule.rule, method) not in covered:
+                missing.append('%s %s' % (method, rule.rule))
+    return sorted(missing)
+
+
+def run_http(workdir, ctx, suite, args):
+    # GET scenarios over real sockets against a server process sharing the seeded database
+    rng = random.Random(args.seed)
+    results = []
+    for mode in args.http_modes.split(','):
+        for auth in (None, 'user', 'admin'):
+            paths = [scenario.build(rng)[0] for scenario in suite
+                     if scenario.method == 'GET' and scenario.auth == auth for _ in range(20)]
+            if not paths:
+                continue
+            try:
+                result = loadtest.run_mode(mode, paths, args.http_requests, args.http_concurrency, args.http_workers,
+                                           workdir=workdir, headers=ctx.headers(auth))
+            except (OSError, RuntimeError) as error:
+                print('http %s skipped: %s' % (mode, error))
+                break
+            result.update(name='http %s GET (%s)' % (mode, auth or 'anonymous'), mode=mode)
+            results.append(result)
+    return results
+
+
+def measure_boot(workdir, runs=BOOT_RUNS, http_mode='sync'):
+    # Worker boot against the already-migrated seeded database (the autoscaling case) and
+    # against an empty directory (first deploy: tables, migrations and sample data)
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    results = []
+    for label, cwd in (('existing database', lambda: workdir),
+                       ('new database', lambda: tempfile.mkdtemp(prefix='english_app_boot_'))):
+        imports, first_requests = [], []
+        for _ in range(runs):
+            output = subprocess.check_output([sys.executable, '-c', BOOT_SCRIPT], cwd=cwd(), env=env)
+            imported, first_request, status = output.split()
+            imports.append(float(imported))
+            first_requests.append(float(first_request))
+        results.append({
+            'name': 'boot (%s)' % label,
+            'runs': runs,
+            'import_ms': round(statistics.median(imports) * 1000, 1),
+            'first_request_ms': round(statistics.median(first_requests) * 1000, 1),
+        })
+    if http_mode:
+        start = time.perf_counter()
+        try:
+            process, port = loadtest.start_server(http_mode, 1, workdir=workdir)
+        except (OSError, RuntimeError) as error:
+            print('http boot skipped: %s' % error)
+            return results
+        try:
+            status = 0
+            while status != 200 and time.perf_counter() - start < 30:
+                status, _ = asyncio.run(loadtest.fetch(port, '/api/topics'))
+            results.append({'name': 'boot (%s server, first 200)' % http_mode, 'runs': 1,
+                            'ready_ms': round((time.perf_counter() - start) * 1000, 1)})
+        finally:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(result):
+    print('%-30s %9.1f req/s   p50 %8.2fms   p95 %8.2fms   p99 %8.2fms   %8s   errors %d' % (
+        result['name'], result['throughput_rps'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+        '%.0fKB' % result['peak_alloc_kb'] if 'peak_alloc_kb' in result else '', result['errors']))
+
+
+def print_comparison(baseline_path, results):
+    with open(baseline_path) as handle:
+        baseline = {result['name']: result for result in json.load(handle)['scenarios']}
+    print('\nvs %s' % baseline_path)
+    for result in results:
+        before = baseline.get(result['name'])
+        if not before or not before['throughput_rps'] or not before['p95_ms']:
+            continue
+        print('%-30s throughput %+6.1f%%   p95 %+6.1f%%' % (
+            result['name'],
+            (result['throughput_rps'] / before['throughput_rps'] - 1) * 100,
+            (result['p95_ms'] / before['p95_ms'] - 1) * 100))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--topics', type=int, default=50)
+    parser.add_argument('--vocabularies-per-topic', type=int, default=20)
+    parser.add_argument('--quizzes-per-topic', type=int, default=5)
+    parser.add_argument('--results', type=int, default=10000)
+    parser.add_argument('--progress', type=int, default=10000)
+    parser.add_argument('--attempts', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=300, help='test-client requests per scenario')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--memory-requests', type=int, default=20)
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--http-modes', default='sync', help="loadtest modes, or '' to skip HTTP")
+    parser.add_argument('--http-requests', type=int, default=2000)
+    parser.add_argument('--http-concurrency', type=int, default=50)
+    parser.add_argument('--http-workers', type=int, default=1)
+    parser.add_argument('--output', help='JSON results path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    args = parser.parse_args(argv)
+    # load_app() changes directory, so resolve user-supplied paths first
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+
+    workdir = tempfile.mkdtemp(prefix='english_app_suite_')
+    app_module = load_app(workdir)
+    start = time.perf_counter()
+    seed.seed(app_module.db, users=args.users, topics=args.topics,
+              vocabularies_per_topic=args.vocabularies_per_topic, quizzes_per_topic=args.quizzes_per_topic,
+              results=args.results, progress=args.progress, attempts=args.attempts, seed=args.seed)
+    with app_module.db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        app_module.UserStats.backfill(conn.cursor())
+        app_module.Leaderboard.backfill(conn.cursor())
+    app_module.analytics.run(app_module.db)
+    app_module.catalog_cache.invalidate()
+    seed_seconds = time.perf_counter() - start
+    print('seeded %s in %.1fs (%s)' % (os.path.join(workdir, 'english_app.db'), seed_seconds, ', '.join(
+        '%s=%d' % (name, getattr(args, name)) for name in ('users', 'topics', 'results', 'progress'))))
+
+    client = app_module.app.test_client()
+    ctx = Context(app_module, client)
+    suite = scenarios(ctx)
+    missing = uncovered_routes(app_module.app, suite)
+    if missing:
+        print('routes without a scenario: %s' % ', '.join(missing))
+    if args.only:
+        names = set(args.only.split(','))
+        suite = [scenario for scenario in suite if scenario.name in names]
+
+    boot = measure_boot(workdir, http_mode=args.http_modes.split(',')[0] if args.http_modes else None)
+    for result in boot:
+        print('%-30s %s' % (result['name'], '   '.join(
+            '%s %.1fms' % (key[:-3], value) for key, value in result.items() if key.endswith('_ms'))))
+
+    results = []
+    for index, scenario in enumerate(suite):
+        result = run_scenario(client, ctx, scenario, args.requests, args.threads, args.memory_requests,
+                              args.seed + index)
+        results.append(result)
+        print_row(result)
+    if args.http_modes:
+        for result in run_http(workdir, ctx, suite, args):
+            results.append(result)
+            print_row(result)
+
+    report = {
+        'timestamp': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': vars(args),
+        'seed_seconds': round(seed_seconds, 2),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'uncovered_routes': missing,
+        'boot': boot,
+        'scenarios': results,
+    }
+    output = output or os.path.join(RESULTS_DIR, report['timestamp'].replace(':', '') + '.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print('max RSS %.0fMB, results written to %s' % (report['max_rss_kb'] / 1024, output))
+    if baseline:
+        print_comparison(baseline, results)
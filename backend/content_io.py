@@ -0,0 +1,188 @@
+# Streaming import/export of catalog content (topics, vocabularies, quizzes) as CSV or JSONL.
+# Records flow through generators and are written in fixed-size chunks, one transaction per
+# chunk, so memory stays flat no matter how large the file is.
+import csv
+import io
+import itertools
+import json
+
+FORMATS = ('csv', 'jsonl')
+LEVELS = ('A1', 'A2', 'B1', 'B2', 'C1', 'C2')
+ANSWERS = ('A', 'B', 'C', 'D')
+MAX_REPORTED_ERRORS = 50
+# SQLite INTEGER is a signed 64-bit value; anything wider raises OverflowError when bound
+MAX_INTEGER = 2 ** 63 - 1
+
+KINDS = {
+    'topics': {
+        'columns': ('id', 'name', 'level', 'description'),
+        'required': ('name', 'level'),
+    },
+    'vocabularies': {
+        'columns': ('id', 'word', 'meaning', 'example', 'pronunciation', 'topic_id'),
+        'required': ('word', 'meaning', 'topic_id'),
+    },
+    'quizzes': {
+        'columns': ('id', 'topic_id', 'question', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer'),
+        'required': ('topic_id', 'question', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer'),
+    },
+}
+
+
+def format_for(path, default='jsonl'):
+    for fmt in FORMATS:
+        if path.lower().endswith('.' + fmt):
+            return fmt
+    return default
+
+
+def read_records(stream, fmt):
+    # Yields (line_number, record dict) from a text stream
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record
+
+
+def validate(kind, record):
+    # Returns the row as a tuple in KINDS[kind]['columns'] order, or raises ValueError
+    if not isinstance(record, dict):
+        raise ValueError('dòng không phải là một đối tượng JSON/CSV hợp lệ')
+    record = dict(record)
+    options = record.pop('options', None)
+    if kind == 'quizzes' and isinstance(options, dict):
+        # Accept the API's {"options": {"A": ..}} shape as well as flat option_a..option_d
+        for key in ANSWERS:
+            record.setdefault('option_' + key.lower(), options.get(key))
+
+    spec = KINDS[kind]
+    values = {}
+    for column in spec['columns']:
+        value = record.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        values[column] = None if value == '' else value
+    missing = [column for column in spec['required'] if values[column] is None]
+    if missing:
+        raise ValueError('thiếu trường: %s' % ', '.join(missing))
+
+    for column, value in values.items():
+        # Only scalars reach SQLite; lists/objects would fail at bind time, halfway through a chunk
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+            raise ValueError('%s phải là chuỗi hoặc số' % column)
+    for column in ('id', 'topic_id'):
+        if column in values and values[column] is not None:
+            values[column] = _integer(column, values[column])
+    if kind == 'topics' and values['level'] not in LEVELS:
+        raise ValueError('level phải là một trong %s' % ', '.join(LEVELS))
+    if kind == 'quizzes':
+        values['correct_answer'] = str(values['correct_answer']).upper()
+        if values['correct_answer'] not in ANSWERS:
+            raise ValueError('correct_answer phải là A, B, C hoặc D')
+    return tuple(values[column] for column in spec['columns'])
+
+
+def _integer(column, value):
+    # Accepts 3, 3.0 and "3"; rejects 1.7 rather than truncating it
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError('%s phải là số nguyên' % column)
+        value = int(value)
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError('%s phải là số nguyên' % column)
+    if not -MAX_INTEGER - 1 <= value <= MAX_INTEGER:
+        raise ValueError('%s nằm ngoài phạm vi cho phép' % column)
+    return value
+
+
+def _upsert_sql(kind):
+    columns = KINDS[kind]['columns']
+    updates = ', '.join('%s = excluded.%s' % (column, column) for column in columns if column != 'id')
+    with_id = 'INSERT INTO %s (%s) VALUES (%s) ON CONFLICT (id) DO UPDATE SET %s' % (
+        kind, ', '.join(columns), ', '.join('?' * len(columns)), updates)
+    without_id = 'INSERT INTO %s (%s) VALUES (%s)' % (
+        kind, ', '.join(columns[1:]), ', '.join('?' * (len(columns) - 1)))
+    return with_id, without_id
+
+
+def import_records(db, kind, records, chunk_size=5000, on_progress=None):
+    # records: iterable of (line_number, record). Invalid rows are skipped and reported.
+    report = {'kind': kind, 'processed': 0, 'imported': 0, 'error_count': 0, 'errors': []}
+    with_id, without_id = _upsert_sql(kind)
+    references_topic = 'topic_id' in KINDS[kind]['columns']
+    topic_index = KINDS[kind]['columns'].index('topic_id') if references_topic else None
+
+    def reject(line_number, message):
+        report['error_count'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'message': message})
+
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+        rows = []
+        for line_number, record in chunk:
+            try:
+                rows.append((line_number, validate(kind, record)))
+            except ValueError as error:
+                reject(line_number, str(error))
+
+        with db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if references_topic and rows:
+                topic_ids = list({row[topic_index] for _, row in rows})
+                known = {row[0] for row in conn.execute(
+                    "SELECT id FROM topics WHERE id IN (%s)" % ', '.join('?' * len(topic_ids)), topic_ids)}
+                valid = []
+                for line_number, row in rows:
+                    if row[topic_index] in known:
+                        valid.append((line_number, row))
+                    else:
+                        reject(line_number, 'topic_id %s không tồn tại' % row[topic_index])
+                rows = valid
+            conn.executemany(with_id, [row for _, row in rows if row[0] is not None])
+            conn.executemany(without_id, [row[1:] for _, row in rows if row[0] is None])
+
+        report['processed'] += len(chunk)
+        report['imported'] += len(rows)
+        if on_progress:
+            on_progress(report)
+    return report
+
+
+def export_records(db, kind, fmt, chunk_size=5000):
+    # Yields text chunks; pages through the table by id so no read transaction stays open between chunks
+    columns = KINDS[kind]['columns']
+    query = 'SELECT %s FROM %s WHERE id > ? ORDER BY id LIMIT ?' % (', '.join(columns), kind)
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+    last_id = 0
+    while True:
+        with db.connection() as conn:
+            rows = conn.execute(query, (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            yield buffer.getvalue()
+        else:
+            yield ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
@@ -0,0 +1,17 @@
+# Picked up automatically by `gunicorn app:app` when started from backend/.
+# Schema work runs once in the master before any worker is forked, so workers
+# (including ones started later by autoscaling or --max-requests) boot without
+# touching the database schema.
+
+
+def on_starting(server):
+    from app import db
+    db.ensure_schema()
+    # Don't carry open SQLite handles into forked workers
+    db.close_all()
+
+
+def worker_exit(server, worker):
+    # Write buffered progress events before the worker goes away
+    from app import progress_events_model
+    progress_events_model.buffer.close()
@@ -0,0 +1,268 @@
+# Per-process request/SQL metrics rendered in the Prometheus text format, plus the
+# sqlite3 connection subclass that feeds them. Nothing here imports the Flask app.
+import bisect
+import cProfile
+import functools
+from contextlib import contextmanager
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    # name -> (type, help, {label tuple: value or Histogram})
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _series(self, kind, name, help_text):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, (kind, help_text, {}))
+        return metric[2]
+
+    def inc(self, name, help_text, labels=(), amount=1):
+        with self._lock:
+            series = self._series('counter', name, help_text)
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, help_text, value, labels=(), buckets=LATENCY_BUCKETS):
+        with self._lock:
+            series = self._series('histogram', name, help_text)
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def total(self, name):
+        # Sum of a counter, or number of observations of a histogram, over all label sets
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                return 0
+            kind, _, series = metric
+            return sum(value if kind == 'counter' else sum(value.counts) for value in series.values())
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, series) in sorted(self._metrics.items()):
+                lines.append('# HELP %s %s' % (name, help_text))
+                lines.append('# TYPE %s %s' % (name, kind))
+                for labels, value in sorted(series.items()):
+                    if kind == 'counter':
+                        lines.append('%s%s %s' % (name, _labels(labels), _number(value)))
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + ('+Inf',), value.counts):
+                        cumulative += count
+                        le = bound if bound == '+Inf' else _number(bound)
+                        lines.append('%s_bucket%s %d' % (name, _labels(labels + (('le', le),)), cumulative))
+                    lines.append('%s_sum%s %s' % (name, _labels(labels), _number(value.sum)))
+                    lines.append('%s_count%s %d' % (name, _labels(labels), cumulative))
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                             for key, value in labels)
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+# METRICS_ENABLED=0 turns off SQL tracing, model timing and per-request metrics entirely
+ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+# Queries run while serving a request are attributed to that request's trace
+_local = threading.local()
+SLOW_QUERY_SECONDS = float(os.environ.get('SLOW_QUERY_MS', 100)) / 1000
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+_WHITESPACE = re.compile(r'\s+')
+
+
+class RequestTrace:
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements = {}
+
+    def record(self, sql, elapsed, many):
+        self.queries += 1
+        self.sql_seconds += elapsed
+        if not many:
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    def repeated_statements(self):
+        # Statements executed one row at a time, over and over: the usual N+1 shape
+        return [(sql, count) for sql, count in self.statements.items() if count >= N_PLUS_ONE_THRESHOLD]
+
+
+def start_trace(route):
+    _local.trace = RequestTrace(route)
+    return _local.trace
+
+
+def end_trace():
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    return trace
+
+
+@contextmanager
+def untraced():
+    # Statements run inside are not attributed to the current request (e.g. one-off schema setup
+    # on a worker's first request, which would otherwise look like an N+1)
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    try:
+        yield
+    finally:
+        _local.trace = trace
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize(sql):
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    return sql, (sql.split(' ', 1)[0].upper() if sql else '')
+
+
+def _record_query(sql, elapsed, many=False):
+    sql, verb = _normalize(sql)
+    registry.observe('sqlite_query_duration_seconds', 'SQLite statement execution time', elapsed,
+                     (('statement', verb),))
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.record(sql, elapsed, many)
+    if elapsed >= SLOW_QUERY_SECONDS:
+        registry.inc('sqlite_slow_queries_total', 'Statements slower than SLOW_QUERY_MS')
+        logger.warning('slow query (%.1fms) in %s: %s', elapsed * 1000,
+                       trace.route if trace else '-', sql[:500])
+
+
+class TracedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - start, many=True)
+
+
+class TracedConnection(sqlite3.Connection):
+    # Pass as `factory=` to sqlite3.connect; every statement is timed and counted
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        registry.inc('sqlite_connections_opened_total', 'SQLite connections opened')
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def instrument(cls):
+    # Class decorator: time every public instance method as model_method_duration_seconds
+    if not ENABLED:
+        return cls
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or not callable(attr) or isinstance(attr, (staticmethod, classmethod)):
+            continue
+        setattr(cls, name, _timed_method('%s.%s' % (cls.__name__, name), attr))
+    return cls
+
+
+def _timed_method(label, method):
+    labels = (('method', label),)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            registry.observe('model_method_duration_seconds', 'Model method latency',
+                             time.perf_counter() - start, labels)
+    return wrapper
+
+
+class SlowRequestProfiler:
+    # Opt-in: with PROFILE_SLOW_MS set, a PROFILE_SAMPLE_RATE fraction of requests run under
+    # cProfile and the ones slower than the threshold are dumped to PROFILE_DIR as pstats files
+    # (readable with snakeviz, flameprof or gprof2dot). Only one request is profiled at a time.
+    def __init__(self, slow_ms=None, sample_rate=1.0, directory='profiles'):
+        self.threshold = slow_ms / 1000 if slow_ms is not None else None
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self._busy = threading.Lock()
+        self._sampled = 0.0
+
+    @classmethod
+    def from_env(cls):
+        slow_ms = os.environ.get('PROFILE_SLOW_MS')
+        return cls(float(slow_ms) if slow_ms else None,
+                   float(os.environ.get('PROFILE_SAMPLE_RATE', 1.0)),
+                   os.environ.get('PROFILE_DIR', 'profiles'))
+
+    def start(self):
+        if self.threshold is None:
+            return None
+        # Deterministic sampling: profile every 1/sample_rate-th request
+        self._sampled += self.sample_rate
+        if self._sampled < 1 or not self._busy.acquire(blocking=False):
+            return None
+        self._sampled -= 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler, route, elapsed):
+        if profiler is None:
+            return
+        try:
+            profiler.disable()
+            if elapsed >= self.threshold:
+                os.makedirs(self.directory, exist_ok=True)
+                name = '%s-%d-%dms.prof' % (re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root',
+                                            time.time() * 1000, elapsed * 1000)
+                profiler.dump_stats(os.path.join(self.directory, name))
+                logger.warning('slow request %s took %.0fms, profile saved to %s', route, elapsed * 1000, name)
+        finally:
+            self._busy.release()
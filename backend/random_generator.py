@@ -0,0 +1,97 @@
+# Builds multiple-choice vocabulary questions on the fly from in-memory word pools.
+# Distractors come from the same topic, then the same level, then the whole catalog.
+# The key is not sent to the client: answers are submitted as {"vocab_id": .., "answer": <chosen meaning>}
+# and graded by Quiz.submit_result.
+import random
+import threading
+from collections import defaultdict, namedtuple
+
+OPTION_KEYS = ('A', 'B', 'C', 'D')
+QUESTION_TEMPLATE = 'Từ "%s" có nghĩa là gì?'
+MAX_DISTRACTOR_DRAWS = 32
+
+Word = namedtuple('Word', 'vocab_id word meaning topic_id level')
+
+
+class WordPools:
+    def __init__(self, words):
+        self.all = list(words)
+        by_topic = defaultdict(list)
+        by_level = defaultdict(list)
+        for word in self.all:
+            by_topic[word.topic_id].append(word)
+            by_level[word.level].append(word)
+        self.by_topic = dict(by_topic)
+        self.by_level = dict(by_level)
+
+
+class RandomQuizGenerator:
+    def __init__(self, load_words, version=lambda: 0):
+        # load_words() -> iterable of (vocab_id, word, meaning, topic_id, level)
+        # version() changes whenever the catalog is written; pools are rebuilt lazily when it does
+        self._load_words = load_words
+        self._version = version
+        self._pools = None
+        self._pools_version = None
+        self._lock = threading.Lock()
+
+    def pools(self):
+        version = self._version()
+        pools = self._pools
+        if pools is None or self._pools_version != version:
+            with self._lock:
+                if self._pools is None or self._pools_version != version:
+                    self._pools = WordPools(Word(*row) for row in self._load_words())
+                    self._pools_version = version
+                pools = self._pools
+        return pools
+
+    def generate(self, topic_id=None, level=None, count=10, seed=None):
+        pools = self.pools()
+        rng = random.Random(seed)
+        if topic_id is not None:
+            candidates = pools.by_topic.get(topic_id, [])
+            if level is not None:
+                candidates = [word for word in candidates if word.level == level]
+        elif level is not None:
+            candidates = pools.by_level.get(level, [])
+        else:
+            candidates = pools.all
+        if not candidates:
+            return []
+
+        if count <= len(candidates):
+            picks = rng.sample(candidates, count)
+        else:
+            picks = [rng.choice(candidates) for _ in range(count)]
+        return [self._question(word, pools, rng) for word in picks]
+
+    def _question(self, word, pools, rng):
+        meanings = self._distractors(word, pools, rng)
+        correct_index = rng.randrange(len(meanings) + 1)
+        meanings.insert(correct_index, word.meaning)
+        return {
+            'vocab_id': word.vocab_id,
+            'topic_id': word.topic_id,
+            'question': QUESTION_TEMPLATE % word.word,
+            'options': dict(zip(OPTION_KEYS, meanings))
+        }
+
+    def _distractors(self, word, pools, rng):
+        needed = len(OPTION_KEYS) - 1
+        chosen = []
+        for pool in (pools.by_topic.get(word.topic_id, []), pools.by_level.get(word.level, []), pools.all):
+            # Random draws instead of filtering the pool keep this O(1) per question
+            for _ in range(MAX_DISTRACTOR_DRAWS):
+                if len(chosen) == needed:
+                    return chosen
+                meaning = rng.choice(pool).meaning
+                if meaning != word.meaning and meaning not in chosen:
+                    chosen.append(meaning)
+        # Tiny catalogs: fall back to an exhaustive pass
+        for candidate in pools.all:
+            if len(chosen) == needed:
+                break
+            if candidate.meaning != word.meaning and candidate.meaning not in chosen:
+                chosen.append(candidate.meaning)
+        return chosen
@@ -0,0 +1,42 @@
+# In-memory sorted leaderboard. Entries are kept in one list ordered by
+# (-average score, -quizzes taken, user_id), so top-K is a slice and a user's rank is a bisect.
+import bisect
+import threading
+
+
+def rank_key(user_id, score_sum, quizzes):
+    return (-score_sum / quizzes, -quizzes, user_id)
+
+
+class RankedBoard:
+    def __init__(self, rows):
+        # rows: iterable of (user_id, score_sum, quizzes)
+        self._keys = sorted(rank_key(*row) for row in rows if row[2])
+        self._by_user = {key[2]: key for key in self._keys}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, user_id, score_sum, quizzes):
+        key = rank_key(user_id, score_sum, quizzes)
+        with self._lock:
+            old = self._by_user.get(user_id)
+            if old is not None:
+                del self._keys[bisect.bisect_left(self._keys, old)]
+            bisect.insort(self._keys, key)
+            self._by_user[user_id] = key
+
+    def top(self, limit, offset=0):
+        # [(rank, user_id, average_score, quizzes)]
+        with self._lock:
+            keys = self._keys[offset:offset + limit]
+        return [(offset + i + 1, key[2], -key[0], -key[1]) for i, key in enumerate(keys)]
+
+    def rank(self, user_id):
+        # (rank, average_score, quizzes) or None when the user has no results on this board
+        with self._lock:
+            key = self._by_user.get(user_id)
+            if key is None:
+                return None
+            return bisect.bisect_left(self._keys, key) + 1, -key[0], -key[1]
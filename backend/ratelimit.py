@@ -0,0 +1,84 @@
+# Token-bucket rate limiting. A bucket holds up to `burst` tokens and refills at `rate`
+# tokens per second; each request takes one. Stores decide where bucket state lives:
+# MemoryStore is per process, SQLiteStore shares buckets between the workers of one host.
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryStore:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        # Returns (allowed, seconds until a token is available)
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            # Least recently used buckets go first; an evicted bucket simply starts full again
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class SQLiteStore:
+    # Buckets in a small SQLite file of their own (not the app database, so throttling never
+    # waits on the app's write lock). Refill and take happen in one atomic upsert.
+    TAKE_SQL = '''
+        INSERT INTO buckets (key, tokens, updated_at, allowed) VALUES (:key, :burst - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = MIN(:burst, tokens + (:now - updated_at) * :rate)
+                     - (MIN(:burst, tokens + (:now - updated_at) * :rate) >= 1),
+            allowed = MIN(:burst, tokens + (:now - updated_at) * :rate) >= 1,
+            updated_at = :now
+        RETURNING allowed, tokens
+    '''
+    # Every PRUNE_EVERY takes (per process), idle buckets are deleted so the table tracks
+    # recently seen clients rather than every client ever seen
+    PRUNE_EVERY = 10000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._takes = itertools.count(1)
+
+    def _connection(self):
+        # One connection per thread, opened on first use
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Rate-limit state is disposable, so trade durability for speed
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                         "updated_at REAL NOT NULL, allowed INTEGER NOT NULL) WITHOUT ROWID")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        allowed, tokens = self._connection().execute(
+            self.TAKE_SQL, {'key': key, 'rate': rate, 'burst': burst, 'now': now}).fetchone()
+        if next(self._takes) % self.PRUNE_EVERY == 0:
+            self.prune()
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / rate
+
+    def prune(self, older_than=3600):
+        # Buckets idle this long are full again anyway (older_than must exceed burst / rate)
+        self._connection().execute("DELETE FROM buckets WHERE updated_at < ?", (time.time() - older_than,))
+
+
+def store_from_env():
+    if os.environ.get('RATE_LIMIT_BACKEND', 'memory') == 'sqlite':
+        return SQLiteStore(os.environ.get('RATE_LIMIT_DB', os.path.join(os.getcwd(), 'rate_limits.db')))
+    return MemoryStore()
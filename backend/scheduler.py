@@ -0,0 +1,40 @@
+# SM-2 spaced-repetition scheduling.
+# Grades follow SuperMemo's 0-5 scale: < 3 means the word was forgotten.
+import datetime
+from collections import namedtuple
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MIN_GRADE = 0
+MAX_GRADE = 5
+PASSING_GRADE = 3
+# Words reviewed at intervals of three weeks or more count as learned
+LEARNED_INTERVAL_DAYS = 21
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+ReviewState = namedtuple('ReviewState', 'ease_factor interval_days repetitions due_at status')
+
+
+def format_timestamp(moment):
+    # Same text format as SQLite's CURRENT_TIMESTAMP so due dates compare correctly in SQL
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def review(grade, now, ease_factor=DEFAULT_EASE, interval_days=0, repetitions=0):
+    if grade < PASSING_GRADE:
+        repetitions = 0
+        interval_days = 1
+    else:
+        if repetitions == 0:
+            interval_days = 1
+        elif repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = int(round(interval_days * ease_factor))
+        repetitions += 1
+
+    ease_factor += 0.1 - (MAX_GRADE - grade) * (0.08 + (MAX_GRADE - grade) * 0.02)
+    ease_factor = max(MIN_EASE, round(ease_factor, 4))
+    status = 'learned' if interval_days >= LEARNED_INTERVAL_DAYS else 'learning'
+    due_at = format_timestamp(now + datetime.timedelta(days=interval_days))
+    return ReviewState(ease_factor, interval_days, repetitions, due_at, status)
@@ -0,0 +1,124 @@
+# In-process write-behind buffer. Writers add keyed items that are coalesced in memory
+# (merge(old, new) per key) and handed to `flush(batch)` by a background thread every
+# `interval` seconds, or sooner once `flush_at` keys are pending. The buffer refuses new keys
+# beyond `max_pending` so a stalled database pushes back on clients instead of growing memory.
+import atexit
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    pass
+
+
+class BufferClosed(Exception):
+    pass
+
+
+class WriteBehindBuffer:
+    def __init__(self, flush, merge, interval=1.0, max_pending=10000, flush_at=None):
+        self._flush = flush
+        self._merge = merge
+        self.interval = interval
+        self.max_pending = max_pending
+        self.flush_at = flush_at or max(1, max_pending // 4)
+        self.flushed = 0
+        self.failures = 0
+        self.rejected = 0
+        self._reset()
+        atexit.register(self.close)
+
+    def _reset(self):
+        # Also run after fork: threads and locks inherited from the parent are not usable
+        self._pid = os.getpid()
+        self._pending = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def _check_process(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def add(self, items):
+        # items: iterable of (key, value). All or nothing: raises BufferFull without keeping any of them.
+        self._check_process()
+        items = list(items)
+        with self._lock:
+            if self._closed:
+                raise BufferClosed()
+            new_keys = len({key for key, _ in items if key not in self._pending})
+            if len(self._pending) + self._in_flight + new_keys > self.max_pending:
+                self.rejected += 1
+                raise BufferFull()
+            for key, value in items:
+                current = self._pending.get(key)
+                self._pending[key] = value if current is None else self._merge(current, value)
+            if len(self._pending) >= self.flush_at:
+                self._wakeup.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._closed and len(self._pending) < self.flush_at:
+                    self._wakeup.wait(self.interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        # Swap the pending map out and write it; on failure the batch is merged back for the next round
+        self._check_process()
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = len(batch)
+            if not batch:
+                return 0
+            try:
+                self._flush(batch)
+            except Exception:
+                self.failures += 1
+                logger.exception('write-behind flush of %d items failed, will retry', len(batch))
+                with self._lock:
+                    for key, value in batch.items():
+                        current = self._pending.get(key)
+                        self._pending[key] = value if current is None else self._merge(value, current)
+                return 0
+            finally:
+                with self._lock:
+                    self._in_flight = 0
+            self.flushed += len(batch)
+            return len(batch)
+
+    def close(self):
+        # Stop the background thread and write whatever is still buffered (atexit, worker_exit)
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'in_flight': self._in_flight,
+                'max_pending': self.max_pending,
+                'flushed': self.flushed,
+                'failures': self.failures,
+                'rejected': self.rejected,
+            }
@@ -1,10 +1,11 @@
 'use client'
 
 import { useState, useEffect } from 'react'
-import { User, Topic, Progress } from '../types'
+import { User, Topic, TopicBundle, Progress } from '../types'
 import TopicCard from './TopicCard'
 import VocabularySection from './VocabularySection'
 import QuizSection from './QuizSection'
+import RandomQuizPlayer from './RandomQuizPlayer'
 import StatisticsPanel from './StatisticsPanel'
 import AchievementBadges from './AchievementBadges'
 import { BarChart3, BookOpen, Trophy } from 'lucide-react'
@@ -15,13 +16,18 @@ interface DashboardProps {
 }
 
 // Type View đã bao gồm 'statistics'
-type View = 'dashboard' | 'vocabulary' | 'quiz' | 'results' | 'statistics' | 'achievements'
+type View = 'dashboard' | 'vocabulary' | 'quiz' | 'random' | 'results' | 'statistics' | 'achievements'
+
+// Topic cards only need the topic columns; vocabularies and quizzes are fetched when a topic is opened
+const TOPIC_PAGE_SIZE = 50
+const TOPIC_CARD_FIELDS = 'id,name,level,description'
 
 export default function Dashboard({ user }: DashboardProps) {
   const t = useTranslation()
   const [currentView, setCurrentView] = useState<View>('dashboard')
   const [topics, setTopics] = useState<Topic[]>([])
-  const [selectedTopic, setSelectedTopic] = useState<Topic | null>(null)
+  const [totalTopics, setTotalTopics] = useState(0)
+  const [selectedTopic, setSelectedTopic] = useState<TopicBundle | null>(null)
   const [progress, setProgress] = useState<Progress>({
     learned_words: 0,
     average_score: 0,
@@ -36,11 +42,14 @@ export default function Dashboard({ user }: DashboardProps) {
     loadProgress()
   }, [])
 
-  const loadTopics = async () => {
+  const loadTopics = async (offset = 0) => {
     try {
-      const response = await fetch(`${backendUrl}/topics`)
+      const response = await fetch(
+        `${backendUrl}/topics/bundle?fields=${TOPIC_CARD_FIELDS}&limit=${TOPIC_PAGE_SIZE}&offset=${offset}`
+      )
       const data = await response.json()
-      setTopics(data)
+      setTopics(previous => offset === 0 ? data.topics : [...previous, ...data.topics])
+      setTotalTopics(data.total)
     } catch (error) {
       console.error('Failed to load topics:', error)
     }
@@ -59,9 +68,16 @@ export default function Dashboard({ user }: DashboardProps) {
     }
   }
 
-  const handleTopicSelect = (topic: Topic) => {
-    setSelectedTopic(topic)
-    setCurrentView('vocabulary')
+  const handleTopicSelect = async (topic: Topic) => {
+    try {
+      // One request for the opened topic together with its vocabularies and quizzes
+      const response = await fetch(`${backendUrl}/topics/bundle?ids=${topic.id}`)
+      const data = await response.json()
+      setSelectedTopic(data.topics[0] ?? { ...topic, vocabularies: [], quizzes: [] })
+      setCurrentView('vocabulary')
+    } catch (error) {
+      console.error('Failed to load topic:', error)
+    }
   }
 
   const handleStartQuiz = () => {
@@ -84,6 +100,7 @@ export default function Dashboard({ user }: DashboardProps) {
     return (
       <VocabularySection
         topic={selectedTopic}
+        initialVocabularies={selectedTopic.vocabularies}
         onBack={handleBackToDashboard}
         onStartQuiz={handleStartQuiz}
       />
@@ -94,12 +111,22 @@ export default function Dashboard({ user }: DashboardProps) {
     return (
       <QuizSection
         topic={selectedTopic}
+        initialQuiz={selectedTopic.quizzes}
         onBack={() => setCurrentView('vocabulary')}
         onComplete={handleQuizComplete}
       />
     )
   }
 
+  if (currentView === 'random') {
+    return (
+      <RandomQuizPlayer
+        onBack={handleBackToDashboard}
+        onComplete={handleQuizComplete}
+      />
+    )
+  }
+
   if (currentView === 'statistics') {
     return (
       <div>
@@ -182,6 +209,12 @@ export default function Dashboard({ user }: DashboardProps) {
         >
           📊 {t.statistics}
         </button>
+        <button
+          onClick={() => setCurrentView('random')}
+          className="px-4 py-2 rounded-lg font-medium transition-colors bg-gray-200 text-gray-700 hover:bg-gray-300"
+        >
+          🎲 {t.randomQuiz}
+        </button>
       </div>
 
       <div className="grid lg:grid-cols-4 gap-8">
@@ -198,6 +231,14 @@ export default function Dashboard({ user }: DashboardProps) {
               />
             ))}
           </div>
+
+          {topics.length < totalTopics && (
+            <div className="text-center mt-8">
+              <button onClick={() => loadTopics(topics.length)} className="btn-outline">
+                {t.loadMoreTopics}
+              </button>
+            </div>
+          )}
         </div>
 
         {/* Progress Sidebar */}
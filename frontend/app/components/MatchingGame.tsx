@@ -3,6 +3,7 @@
 import { useState, useEffect } from 'react'
 import { Vocabulary } from '../types'
 import { useTranslation } from '../utils/translations'
+import { trackProgress } from '../utils/progressEvents'
 import { CheckCircle, XCircle } from 'lucide-react'
 
 interface MatchingGameProps {
@@ -61,6 +62,7 @@ export default function MatchingGame({ vocabularies, onComplete }: MatchingGameP
 
       if (firstCard && secondCard && firstCard.vocabId === secondCard.vocabId && firstCard.type !== secondCard.type) {
         // Match found!
+        trackProgress(firstCard.vocabId, 'matching', true)
         setTimeout(() => {
           setGameWords(prev => prev.map(w => 
             w.id === first || w.id === second ? { ...w, matched: true } : w
@@ -74,6 +76,7 @@ export default function MatchingGame({ vocabularies, onComplete }: MatchingGameP
         }, 500)
       } else {
         // No match
+        if (firstCard) trackProgress(firstCard.vocabId, 'matching', false)
         setTimeout(() => {
           setSelectedCards([])
         }, 1000)
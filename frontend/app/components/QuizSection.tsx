@@ -7,11 +7,12 @@ import { useTranslation } from '../utils/translations'
 
 interface QuizSectionProps {
   topic: Topic
+  initialQuiz?: Quiz[]
   onBack: () => void
   onComplete: (score: any) => void
 }
 
-export default function QuizSection({ topic, onBack, onComplete }: QuizSectionProps) {
+export default function QuizSection({ topic, initialQuiz, onBack, onComplete }: QuizSectionProps) {
   const t = useTranslation()
   const [quiz, setQuiz] = useState<Quiz[]>([])
   const [currentIndex, setCurrentIndex] = useState(0)
@@ -26,6 +27,11 @@ export default function QuizSection({ topic, onBack, onComplete }: QuizSectionPr
   }, [topic.id])
 
   const loadQuiz = async () => {
+    if (initialQuiz) {
+      setQuiz(initialQuiz)
+      setLoading(false)
+      return
+    }
     try {
       const response = await fetch(`${backendUrl}/topics/${topic.id}/quiz`)
       const data = await response.json()
@@ -72,7 +78,10 @@ export default function QuizSection({ topic, onBack, onComplete }: QuizSectionPr
           'Content-Type': 'application/json',
           'Authorization': `Bearer ${token}`
         },
-        body: JSON.stringify({ results: finalAnswers })
+        // The server grades each answer against its own answer key
+        body: JSON.stringify({
+          answers: finalAnswers.map(a => ({ quiz_id: a.quiz_id, answer: a.selected_answer }))
+        })
       })
 
       const result = await response.json()
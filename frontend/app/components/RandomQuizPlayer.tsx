@@ -0,0 +1,160 @@
+'use client'
+
+import { useState, useEffect } from 'react'
+import { ArrowLeft } from 'lucide-react'
+import { RandomQuestion } from '../types'
+import { useTranslation } from '../utils/translations'
+
+interface RandomQuizPlayerProps {
+  topicId?: number
+  level?: string
+  count?: number
+  onBack: () => void
+  onComplete: (score: any) => void
+}
+
+export default function RandomQuizPlayer({ topicId, level, count = 10, onBack, onComplete }: RandomQuizPlayerProps) {
+  const t = useTranslation()
+  const [questions, setQuestions] = useState<RandomQuestion[]>([])
+  const [currentIndex, setCurrentIndex] = useState(0)
+  const [answers, setAnswers] = useState<{ vocab_id: number, answer: string }[]>([])
+  const [selectedAnswer, setSelectedAnswer] = useState<string>('')
+  const [loading, setLoading] = useState(true)
+
+  const backendUrl = process.env.NEXT_PUBLIC_BACKEND_API_URL || 'http://localhost:5000/api';
+
+  useEffect(() => {
+    loadQuestions()
+  }, [topicId, level, count])
+
+  const loadQuestions = async () => {
+    try {
+      const params = new URLSearchParams({ count: String(count) })
+      if (topicId) params.set('topic_id', String(topicId))
+      if (level) params.set('level', level)
+      const response = await fetch(`${backendUrl}/quiz/random?${params}`)
+      const data = await response.json()
+      setQuestions(data)
+    } catch (error) {
+      console.error('Failed to load random quiz:', error)
+    } finally {
+      setLoading(false)
+    }
+  }
+
+  const handleNext = () => {
+    if (!selectedAnswer) return
+
+    const currentQuestion = questions[currentIndex]
+    const newAnswers = [...answers, {
+      vocab_id: currentQuestion.vocab_id,
+      answer: currentQuestion.options[selectedAnswer as keyof RandomQuestion['options']]
+    }]
+    setAnswers(newAnswers)
+
+    if (currentIndex < questions.length - 1) {
+      setCurrentIndex(currentIndex + 1)
+      setSelectedAnswer('')
+    } else {
+      submitQuiz(newAnswers)
+    }
+  }
+
+  const submitQuiz = async (finalAnswers: { vocab_id: number, answer: string }[]) => {
+    try {
+      const token = localStorage.getItem('token')
+      const response = await fetch(`${backendUrl}/quiz/submit`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${token}`
+        },
+        body: JSON.stringify({ answers: finalAnswers })
+      })
+
+      const result = await response.json()
+      onComplete(result)
+    } catch (error) {
+      console.error('Failed to submit quiz:', error)
+    }
+  }
+
+  if (loading) {
+    return (
+      <div className="flex items-center justify-center min-h-[400px]">
+        <div className="animate-spin rounded-full h-32 w-32 border-b-2 border-blue-600"></div>
+      </div>
+    )
+  }
+
+  if (questions.length === 0) {
+    return (
+      <div className="text-center">
+        <h2 className="text-2xl font-bold mb-4">{t.noQuizAvailable}</h2>
+        <button onClick={onBack} className="btn-primary">
+          <ArrowLeft className="h-4 w-4 mr-2" />
+          {t.backToTopics}
+        </button>
+      </div>
+    )
+  }
+
+  const currentQuestion = questions[currentIndex]
+
+  return (
+    <div className="max-w-4xl mx-auto">
+      {/* Header */}
+      <div className="flex items-center justify-between mb-8">
+        <button onClick={onBack} className="btn-secondary">
+          <ArrowLeft className="h-4 w-4 mr-2" />
+          {t.backToTopics}
+        </button>
+        <h2 className="text-3xl font-bold text-gray-800">{t.randomQuiz}</h2>
+        <div className="text-sm text-gray-600">
+          {t.question} {currentIndex + 1} {t.of} {questions.length}
+        </div>
+      </div>
+
+      {/* Progress Bar */}
+      <div className="w-full bg-gray-200 rounded-full h-2 mb-8">
+        <div
+          className="bg-green-600 h-2 rounded-full transition-all duration-300"
+          style={{ width: `${((currentIndex + 1) / questions.length) * 100}%` }}
+        ></div>
+      </div>
+
+      {/* Question */}
+      <div className="card mb-8">
+        <h3 className="text-2xl font-bold mb-6">{currentQuestion.question}</h3>
+
+        <div className="space-y-3">
+          {Object.entries(currentQuestion.options).map(([key, value]) => (
+            <button
+              key={key}
+              onClick={() => setSelectedAnswer(key)}
+              className={`w-full text-left p-4 rounded-lg border-2 transition-all duration-200 ${
+                selectedAnswer === key
+                  ? 'border-blue-500 bg-blue-50 text-blue-700'
+                  : 'border-gray-200 hover:border-gray-300 hover:bg-gray-50'
+              }`}
+            >
+              <span className="font-semibold mr-3">{key}.</span>
+              {value}
+            </button>
+          ))}
+        </div>
+      </div>
+
+      {/* Next Button */}
+      <div className="text-center">
+        <button
+          onClick={handleNext}
+          disabled={!selectedAnswer}
+          className="btn-primary disabled:opacity-50 disabled:cursor-not-allowed text-lg px-8 py-4"
+        >
+          {currentIndex === questions.length - 1 ? t.finishQuiz : t.nextQuestion}
+        </button>
+      </div>
+    </div>
+  )
+}
@@ -4,17 +4,19 @@ import { useState, useEffect } from 'react'
 import { ArrowLeft, RotateCcw, Check, X, Play } from 'lucide-react'
 import { Topic, Vocabulary } from '../types'
 import { useTranslation } from '../utils/translations'
+import { trackProgress } from '../utils/progressEvents'
 import StudyModeSelector from './StudyModeSelector'
 import MatchingGame from './MatchingGame'
 import WritingPractice from './WritingPractice'
 
 interface VocabularySectionProps {
   topic: Topic
+  initialVocabularies?: Vocabulary[]
   onBack: () => void
   onStartQuiz: () => void
 }
 
-export default function VocabularySection({ topic, onBack, onStartQuiz }: VocabularySectionProps) {
+export default function VocabularySection({ topic, initialVocabularies, onBack, onStartQuiz }: VocabularySectionProps) {
   const t = useTranslation()
   const [vocabularies, setVocabularies] = useState<Vocabulary[]>([])
   const [currentIndex, setCurrentIndex] = useState(0)
@@ -29,6 +31,11 @@ export default function VocabularySection({ topic, onBack, onStartQuiz }: Vocabu
   }, [topic.id])
 
   const loadVocabularies = async () => {
+    if (initialVocabularies) {
+      setVocabularies(initialVocabularies)
+      setLoading(false)
+      return
+    }
     try {
       const response = await fetch(`${backendUrl}/topics/${topic.id}/vocabularies`)
       const data = await response.json()
@@ -43,7 +50,7 @@ export default function VocabularySection({ topic, onBack, onStartQuiz }: Vocabu
   const currentVocab = vocabularies[currentIndex]
 
   const handleNext = (understood: boolean) => {
-    // Here you could track progress
+    trackProgress(currentVocab.id, 'flashcard', understood)
     if (currentIndex < vocabularies.length - 1) {
       setCurrentIndex(currentIndex + 1)
       setIsFlipped(false)
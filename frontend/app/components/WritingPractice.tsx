@@ -3,6 +3,7 @@
 import { useState, useEffect } from 'react'
 import { Vocabulary } from '../types'
 import { useTranslation } from '../utils/translations'
+import { trackProgress } from '../utils/progressEvents'
 import { CheckCircle, XCircle, RotateCcw } from 'lucide-react'
 
 interface WritingPracticeProps {
@@ -25,6 +26,7 @@ export default function WritingPractice({ vocabularies, onComplete }: WritingPra
     const correct = userAnswer.toLowerCase().trim() === currentVocab.word.toLowerCase().trim()
     setIsCorrect(correct)
     setShowResult(true)
+    trackProgress(currentVocab.id, 'writing', correct)
     setAttempts(attempts + 1)
     
     if (correct) {
@@ -34,6 +34,23 @@ export interface Quiz {
   correct_answer: string
 }
 
+export interface RandomQuestion {
+  vocab_id: number
+  topic_id: number
+  question: string
+  options: {
+    A: string
+    B: string
+    C: string
+    D: string
+  }
+}
+
+export interface TopicBundle extends Topic {
+  vocabularies: Vocabulary[]
+  quizzes: Quiz[]
+}
+
 export interface QuizResult {
   quiz_id: number
   selected_answer: string
@@ -45,4 +62,14 @@ export interface Progress {
   learned_words: number
   average_score: number
   quizzes_taken: number
+  current_streak?: number
+  longest_streak?: number
+}
+
+export type StudyMode = 'flashcard' | 'matching' | 'writing'
+
+export interface ProgressEvent {
+  vocab_id: number
+  mode: StudyMode
+  correct: boolean
 }
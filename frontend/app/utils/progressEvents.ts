@@ -0,0 +1,63 @@
+import { ProgressEvent, StudyMode } from '../types'
+
+// Study-mode interactions are queued here and sent to /progress/events in batches,
+// so a flashcard session costs a handful of requests instead of one per card.
+const FLUSH_DELAY_MS = 3000
+const MAX_BATCH = 100
+
+const backendUrl = process.env.NEXT_PUBLIC_BACKEND_API_URL || 'http://localhost:5000/api'
+
+let queue: ProgressEvent[] = []
+let timer: ReturnType<typeof setTimeout> | null = null
+
+export function trackProgress(vocabId: number, mode: StudyMode, correct: boolean) {
+  queue.push({ vocab_id: vocabId, mode, correct })
+  if (queue.length >= MAX_BATCH) {
+    flushProgress()
+  } else if (!timer) {
+    timer = setTimeout(flushProgress, FLUSH_DELAY_MS)
+  }
+}
+
+export async function flushProgress(keepalive = false) {
+  if (timer) {
+    clearTimeout(timer)
+    timer = null
+  }
+  const token = localStorage.getItem('token')
+  if (!token || queue.length === 0) return
+
+  const batch = queue.slice(0, MAX_BATCH)
+  queue = queue.slice(MAX_BATCH)
+  try {
+    const response = await fetch(`${backendUrl}/progress/events`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`
+      },
+      body: JSON.stringify({ events: batch }),
+      keepalive
+    })
+    if (response.status === 429 || response.status === 503) {
+      // Server is shedding load: keep the events and retry after the advertised delay
+      queue = batch.concat(queue)
+      const retryAfter = Number(response.headers.get('Retry-After')) || 5
+      timer = setTimeout(flushProgress, retryAfter * 1000)
+      return
+    }
+  } catch (error) {
+    queue = batch.concat(queue)
+    console.error('Failed to send progress events:', error)
+  }
+  if (queue.length > 0 && !timer) {
+    timer = setTimeout(flushProgress, FLUSH_DELAY_MS)
+  }
+}
+
+if (typeof window !== 'undefined') {
+  // keepalive lets the last batch go out while the tab is being hidden or closed
+  window.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushProgress(true)
+  })
+}
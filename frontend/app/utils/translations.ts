@@ -33,6 +33,7 @@ export const translations = {
     
     // Dashboard
     chooseTopicTitle: 'Chọn chủ đề',
+    loadMoreTopics: 'Xem thêm chủ đề',
     yourProgress: 'Tiến độ của bạn',
     wordsLearned: 'Từ đã học',
     averageScore: 'Điểm trung bình',
@@ -58,6 +59,7 @@ export const translations = {
     finishQuiz: 'Hoàn thành bài kiểm tra',
     nextQuestion: 'Câu hỏi tiếp theo',
     noQuizAvailable: 'Không có bài kiểm tra',
+    randomQuiz: 'Quiz ngẫu nhiên',
     
     // Results
     quizResults: 'Kết quả bài kiểm tra',
@@ -147,6 +149,7 @@ export const translations = {
     
     // Dashboard
     chooseTopicTitle: 'Choose a Topic',
+    loadMoreTopics: 'Load more topics',
     yourProgress: 'Your Progress',
     wordsLearned: 'Words Learned',
     averageScore: 'Average Score',
@@ -172,6 +175,7 @@ export const translations = {
     finishQuiz: 'Finish Quiz',
     nextQuestion: 'Next Question',
     noQuizAvailable: 'No quiz available',
+    randomQuiz: 'Random Quiz',
     
     // Results
     quizResults: 'Quiz Results',